@@ -0,0 +1,187 @@
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import jsonify, request, session
+from pymongo import ReturnDocument
+
+
+class Limit:
+    # Token bucket: `burst` requests at once, refilled at `per_minute`
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+
+
+class MemoryBuckets:
+    # Per-process buckets. Each gunicorn worker counts on its own, so the
+    # effective limit is up to workers x the configured one.
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: Limit) -> float:
+        # 0 if a token was taken, else seconds until one is available
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (1 - tokens) / limit.rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, limit)
+        return wait
+
+    def _prune(self, now, limit):
+        # A bucket idle long enough to have refilled is the same as no bucket
+        full_after = limit.burst / limit.rate if limit.rate else 0
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= full_after:
+                del self._buckets[key]
+
+
+class MongoBuckets:
+    # Buckets shared by every worker, one document per key updated atomically
+    # with an update pipeline (MongoDB 4.2+). Documents expire once idle.
+    # If Mongo is unreachable requests are admitted: the limiter must not
+    # take checkout down with it.
+    def __init__(self, get_db, collection: str = "rate_limits", logger=None):
+        self._get_db = get_db
+        self._collection = collection
+        self._logger = logger
+        self._indexed = False
+        self.errors = 0
+
+    def take(self, key: str, limit: Limit) -> float:
+        coll = self._get_db()[self._collection]
+        now = time.time()
+        available = {"$min": [limit.burst, {"$add": [
+            {"$ifNull": ["$tokens", limit.burst]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated", now]}]}, limit.rate]},
+        ]}]}
+        idle_ms = int(limit.burst / limit.rate * 1000) + 60000 if limit.rate else 3600000
+        try:
+            if not self._indexed:
+                coll.create_index("expires_at", expireAfterSeconds=0)
+                self._indexed = True
+            doc = coll.find_one_and_update(
+                {"_id": key},
+                [
+                    {"$set": {"available": available}},
+                    {"$set": {
+                        "admitted": {"$gte": ["$available", 1]},
+                        "tokens": {"$cond": [{"$gte": ["$available", 1]},
+                                             {"$subtract": ["$available", 1]}, "$available"]},
+                        "updated": now,
+                        "expires_at": {"$add": ["$$NOW", idle_ms]},
+                    }},
+                    {"$unset": "available"},
+                ],
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except Exception as e:
+            self.errors += 1
+            if self._logger:
+                self._logger.warning("Rate limit backend failed, admitting: %s", e)
+            return 0.0
+        if doc["admitted"]:
+            return 0.0
+        return (1 - doc["tokens"]) / limit.rate
+
+
+class RouteCounts:
+    __slots__ = ("admitted", "rate_limited", "overloaded")
+
+    def __init__(self):
+        self.admitted = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+
+class AdmissionController:
+    # Guards the expensive routes (checkout, translate):
+    #  - a token bucket per user and route -> 429 with Retry-After
+    #  - at most `max_inflight` of these requests at once in this worker, so
+    #    a spike can't take every thread and DB connection; a request waits
+    #    up to `queue_timeout` for a slot before it is shed -> 503
+    def __init__(self, limits: dict, max_inflight: int, backend=None, queue_timeout: float = 0.0,
+                 enabled: bool = True):
+        self.limits = limits
+        self.max_inflight = max_inflight
+        self.backend = backend or MemoryBuckets()
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self._slots = threading.BoundedSemaphore(max_inflight)
+        self._inflight = 0
+        self.peak_inflight = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, field: str):
+        with self._lock:
+            counts = self._counts.setdefault(name, RouteCounts())
+            setattr(counts, field, getattr(counts, field) + 1)
+
+    @staticmethod
+    def _client_key() -> str:
+        user = session.get("user_id") or session.get("uid") or request.remote_addr
+        return str(user)
+
+    def limit(self, name: str):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+
+                limit = self.limits.get(name)
+                if limit is not None and limit.rate > 0:
+                    wait = self.backend.take(f"{name}:{self._client_key()}", limit)
+                    if wait > 0:
+                        self._count(name, "rate_limited")
+                        return jsonify({"success": False, "error": "Too many requests, slow down"}), 429, \
+                            {"Retry-After": str(max(1, math.ceil(wait)))}
+
+                if self.queue_timeout > 0:
+                    acquired = self._slots.acquire(timeout=self.queue_timeout)
+                else:
+                    acquired = self._slots.acquire(blocking=False)
+                if not acquired:
+                    self._count(name, "overloaded")
+                    return jsonify({"success": False, "error": "Server busy, try again shortly"}), 503, \
+                        {"Retry-After": "1"}
+
+                with self._lock:
+                    self._inflight += 1
+                    self.peak_inflight = max(self.peak_inflight, self._inflight)
+                self._count(name, "admitted")
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    with self._lock:
+                        self._inflight -= 1
+                    self._slots.release()
+            return wrapper
+        return decorator
+
+    def stats(self) -> dict:
+        with self._lock:
+            routes = {name: {"admitted": c.admitted, "rate_limited": c.rate_limited,
+                             "overloaded": c.overloaded}
+                      for name, c in sorted(self._counts.items())}
+            inflight = self._inflight
+        return {
+            "enabled": self.enabled,
+            "inflight": inflight,
+            "peak_inflight": self.peak_inflight,
+            "max_inflight": self.max_inflight,
+            "backend_errors": getattr(self.backend, "errors", 0),
+            "routes": routes,
+        }
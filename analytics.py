@@ -0,0 +1,206 @@
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+MAX_DAYS = 366
+MAX_TOP_ITEMS = 100
+
+# table -> (key columns, counter columns)
+ROLLUPS = {
+    "sales_daily": (("day",), ("orders", "revenue")),
+    "sales_status": (("status",), ("orders",)),
+    "sales_items": (("menu_id",), ("quantity", "revenue")),
+}
+
+
+def _upsert_add(conn, table: str, rows):
+    # Adds each row's counters onto the existing totals, creating the row if
+    # needed; one statement (executemany) per table
+    keys, counters = ROLLUPS[table]
+    cols = keys + counters
+    insert = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(':' + c for c in cols)})"
+    if conn.dialect.name == "mysql":
+        sets = ", ".join(f"{c} = {c} + VALUES({c})" for c in counters)
+        sql = f"{insert} ON DUPLICATE KEY UPDATE {sets}"
+    else:
+        sets = ", ".join(f"{c} = {c} + excluded.{c}" for c in counters)
+        sql = f"{insert} ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {sets}"
+    conn.execute(text(sql), rows)
+
+
+def today() -> str:
+    # Rollup days are UTC, like CURRENT_TIMESTAMP on Cloud SQL
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class RollupWriter:
+    # Checkout and status changes only add to in-memory deltas; a background
+    # thread compacts them into the rollup tables every `flush_interval`
+    # seconds in one transaction (one upsert per table). A crash loses at most
+    # one interval of deltas; `python -m analytics backfill` repairs that.
+    def __init__(self, get_engine, flush_interval: float = 5.0, logger=None):
+        self._get_engine = get_engine
+        self.flush_interval = flush_interval
+        self._logger = logger
+        self._pending = self._empty()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self.flushes = 0
+        self.flush_failures = 0
+
+    @staticmethod
+    def _empty():
+        return {table: defaultdict(lambda n=len(ROLLUPS[table][1]): [0] * n) for table in ROLLUPS}
+
+    def _add(self, table, key, *values):
+        row = self._pending[table][key]
+        for i, v in enumerate(values):
+            row[i] += v
+
+    def order_created(self, total, lines, status: str = "pending", day: str = None):
+        # lines: [{"menu_id", "quantity", "price"}]
+        with self._lock:
+            self._add("sales_daily", (day or today(),), 1, total)
+            self._add("sales_status", (status,), 1)
+            for l in lines:
+                self._add("sales_items", (l["menu_id"],), l["quantity"], l["price"] * l["quantity"])
+        self._ensure_started()
+
+    def status_changed(self, old_status: str, new_status: str, count: int = 1):
+        if old_status == new_status or not count:
+            return
+        with self._lock:
+            self._add("sales_status", (old_status,), -count)
+            self._add("sales_status", (new_status,), count)
+        self._ensure_started()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, self._empty()
+            if not any(pending.values()):
+                return
+            try:
+                with self._get_engine().begin() as conn:
+                    for table, deltas in pending.items():
+                        if deltas:
+                            keys, counters = ROLLUPS[table]
+                            _upsert_add(conn, table, [
+                                dict(zip(keys + counters, key + tuple(values)))
+                                for key, values in deltas.items()
+                            ])
+                self.flushes += 1
+            except Exception:
+                # Put the deltas back so the next flush retries them
+                self.flush_failures += 1
+                with self._lock:
+                    for table, deltas in pending.items():
+                        for key, values in deltas.items():
+                            self._add(table, key, *values)
+                raise
+
+    def close(self):
+        try:
+            self.flush()
+        except Exception:
+            if self._logger:
+                self._logger.exception("Sales rollup flush failed")
+
+    def _ensure_started(self):
+        # Lazily, and again after a fork, like EventWriter
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="sales-rollups", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.close()
+
+
+def rebuild(engine) -> dict:
+    # Recomputes every rollup from orders/order_items in one transaction.
+    # Item revenue uses the stored line totals (current menu prices for lines
+    # that predate them and haven't been backfilled).
+    with engine.begin() as conn:
+        for table in ROLLUPS:
+            conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text("""
+            INSERT INTO sales_daily (day, orders, revenue)
+            SELECT DATE(created_at), COUNT(*), COALESCE(SUM(total), 0)
+            FROM orders
+            GROUP BY DATE(created_at)
+        """))
+        conn.execute(text("""
+            INSERT INTO sales_status (status, orders)
+            SELECT status, COUNT(*) FROM orders GROUP BY status
+        """))
+        conn.execute(text("""
+            INSERT INTO sales_items (menu_id, quantity, revenue)
+            SELECT oi.menu_id, SUM(oi.quantity),
+                   COALESCE(SUM(COALESCE(oi.line_total, oi.quantity * m.price)), 0)
+            FROM order_items oi
+            LEFT JOIN menu m ON m.id = oi.menu_id
+            GROUP BY oi.menu_id
+        """))
+        return {table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                for table in ROLLUPS}
+
+
+def summary(conn, days: int = 30, top: int = 10) -> dict:
+    # Reads only the rollup tables: at most `days` + statuses + `top` rows
+    days = max(1, min(int(days), MAX_DAYS))
+    top = max(1, min(int(top), MAX_TOP_ITEMS))
+    since = (date.fromisoformat(today()) - timedelta(days=days - 1)).isoformat()
+
+    daily = conn.execute(
+        text("SELECT day, orders, revenue FROM sales_daily WHERE day >= :since ORDER BY day"),
+        {"since": since}
+    ).fetchall()
+    statuses = conn.execute(text("SELECT status, orders FROM sales_status")).fetchall()
+    items = conn.execute(
+        text("""
+            SELECT s.menu_id, m.name, s.quantity, s.revenue
+            FROM sales_items s
+            LEFT JOIN menu m ON m.id = s.menu_id
+            ORDER BY s.quantity DESC, s.menu_id
+            LIMIT :top
+        """),
+        {"top": top}
+    ).fetchall()
+
+    return {
+        "daily_revenue": [
+            {"day": str(r[0]), "orders": r[1], "revenue": round(float(r[2]), 2)} for r in daily
+        ],
+        "orders_by_status": {r[0]: r[1] for r in statuses},
+        "top_items": [
+            {"menu_id": r[0], "name": r[1], "quantity": r[2], "revenue": round(float(r[3]), 2)}
+            for r in items
+        ],
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["backfill"]:
+        print("usage: python -m analytics backfill")
+        sys.exit(2)
+
+    from db import mysql_engine
+
+    for table, rows in rebuild(mysql_engine).items():
+        print(f"{table}: {rows} rows")
+    sys.exit(0)
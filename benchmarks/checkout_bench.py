@@ -0,0 +1,122 @@
+"""Round trips per order and checkout latency against cart size.
+
+    python -m benchmarks.checkout_bench --sizes 1 5 15 30 --rtt-ms 1
+
+Runs POST /api/order through the Flask test client against a SQLite stand-in.
+--rtt-ms adds a fake network delay per statement so the numbers look more like
+Cloud SQL. The "legacy" rows replay the old per-item SELECT/INSERT loop.
+Both modes time only the database section: how long a connection is checked
+out of the pool, so the Flask request around the batched path doesn't count.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import event, text
+
+from benchmarks.localdb import FakeMongoDB, RoundTripCounter, make_engine, seed
+from benchmarks.report import percentile
+from benchmarks.stubs import load_app, login
+
+
+def legacy_checkout(engine, user_id, items):
+    # The pre-batching create_order SQL, kept here for comparison only
+    with engine.begin() as conn:
+        order_id = conn.execute(
+            text("INSERT INTO orders (user_id, total, status) VALUES (:user_id, 0, 'pending')"),
+            {"user_id": user_id}
+        ).lastrowid
+        total = 0.0
+        for item in items:
+            row = conn.execute(
+                text("SELECT price FROM menu WHERE id = :menu_id"),
+                {"menu_id": item["menu_id"]}
+            ).fetchone()
+            if not row:
+                continue
+            total += float(row[0]) * item["quantity"]
+            conn.execute(
+                text("INSERT INTO order_items (order_id, menu_id, quantity) "
+                     "VALUES (:order_id, :menu_id, :quantity)"),
+                {"order_id": order_id, "menu_id": item["menu_id"], "quantity": item["quantity"]}
+            )
+        conn.execute(
+            text("UPDATE orders SET total = :total WHERE id = :order_id"),
+            {"total": total, "order_id": order_id}
+        )
+
+
+class ConnectionTimer:
+    # Total time connections spend checked out of the engine's pool
+    def __init__(self, engine):
+        self.seconds = 0.0
+        self._started = {}
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_conn, record, proxy):
+        self._started[id(record)] = time.perf_counter()
+
+    def _on_checkin(self, dbapi_conn, record):
+        start = self._started.pop(id(record), None)
+        if start is not None:
+            self.seconds += time.perf_counter() - start
+
+    def reset(self):
+        self.seconds = 0.0
+
+
+def run(sizes, iterations, rtt_ms, menu_items):
+    engine = make_engine()
+    seed(engine, menu_items=menu_items)
+    counter = RoundTripCounter(engine, rtt_ms=rtt_ms)
+    timer = ConnectionTimer(engine)
+
+    main = load_app(engine, FakeMongoDB())
+    client = main.app.test_client()
+    login(client)
+
+    results = []
+    for size in sizes:
+        items = [{"menu_id": (i % menu_items) + 1, "quantity": 1 + i % 3} for i in range(size)]
+
+        for mode in ("batched", "legacy"):
+            timings = []
+            trips = []
+            for _ in range(iterations):
+                counter.reset()
+                timer.reset()
+                if mode == "batched":
+                    res = client.post("/api/order", json={"items": items})
+                    assert res.status_code == 200, res.get_json()
+                else:
+                    legacy_checkout(engine, 1, items)
+                timings.append(timer.seconds * 1000)
+                trips.append(counter.count)
+
+            results.append({
+                "mode": mode,
+                "cart_size": size,
+                "round_trips": statistics.mean(trips),
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 15, 30])
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=0.0)
+    parser.add_argument("--menu-items", type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'cart':>5} {'trips':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in run(args.sizes, args.iterations, args.rtt_ms, args.menu_items):
+        print(f"{r['mode']:<8} {r['cart_size']:>5} {r['round_trips']:>6.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
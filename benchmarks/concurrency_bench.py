@@ -0,0 +1,189 @@
+"""Throughput of sync vs threaded workers when upstreams are slow.
+
+    python -m benchmarks.concurrency_bench --clients 16 --threads 8 --upstream-ms 50 --rtt-ms 2
+
+Serves the app over real HTTP twice: once the way a gunicorn sync worker does
+(one request at a time) and once like a gthread worker (a fixed pool of
+--threads). Each database statement sleeps --rtt-ms and each Translation API
+call sleeps --upstream-ms, standing in for Cloud SQL and Google. The same
+client load runs against both; one worker process each, so multiply by
+GUNICORN_WORKERS for a deployment.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from benchmarks import report
+from benchmarks.localdb import FakeMongoDB, RoundTripCounter, make_engine, seed, seed_orders
+from benchmarks.stubs import load_app
+
+# request name -> relative weight; all read-only so SQLite's single writer
+# lock doesn't dominate the comparison
+MIX = {"menu": 30, "order_detail": 40, "translate": 30}
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    # gthread-style: a fixed pool of worker threads takes accepted connections
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=QuietHandler)
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class FakeTranslateResponse:
+    status_code = 200
+
+    def __init__(self, texts):
+        self._texts = texts
+
+    def json(self):
+        return {"data": {"translations": [{"translatedText": t[::-1]} for t in self._texts]}}
+
+
+def _fake_translate_post(upstream_ms):
+    def post(url, params=None, json=None, timeout=None, **kwargs):
+        time.sleep(upstream_ms / 1000.0)
+        return FakeTranslateResponse(json["q"])
+    return post
+
+
+def _serve(main, model, threads):
+    if model == "sync":
+        server = BaseWSGIServer("127.0.0.1", 0, main.app, handler=QuietHandler)
+    else:
+        server = PooledWSGIServer("127.0.0.1", 0, main.app, threads)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _drive(base_url, cookie, clients, duration, orders):
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+    names, weights = list(MIX), list(MIX.values())
+
+    def worker(idx):
+        rng = random.Random(idx)
+        http = requests.Session()
+        http.cookies.set("session", cookie)
+        n = 0
+        local_t, local_e = defaultdict(list), defaultdict(int)
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights=weights)[0]
+            n += 1
+            start = time.perf_counter()
+            if name == "menu":
+                res = http.get(f"{base_url}/api/menu")
+            elif name == "order_detail":
+                # Orders are seeded round-robin over 5 users; user 1 owns 1, 6, 11...
+                res = http.get(f"{base_url}/api/order/{1 + 5 * rng.randrange(orders // 5)}")
+            else:
+                # Unique text so the translation cache never answers
+                res = http.post(f"{base_url}/api/translate", json={"text": f"dish {idx}-{n}", "target": "fr"})
+            local_t[name].append((time.perf_counter() - start) * 1000)
+            if res.status_code >= 400:
+                local_e[name] += 1
+        with lock:
+            for name, samples in local_t.items():
+                timings[name].extend(samples)
+            for name, count in local_e.items():
+                errors[name] += count
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [s for samples in timings.values() for s in samples]
+    return {
+        "total": report.summarize(all_samples, sum(errors.values()), elapsed),
+        "endpoints": {name: report.summarize(timings[name], errors[name], elapsed)
+                      for name in names if timings[name]},
+    }
+
+
+def run(clients=16, threads=8, duration=5.0, upstream_ms=50.0, rtt_ms=2.0, orders=500, models=("sync", "gthread")):
+    db_dir = tempfile.mkdtemp(prefix="concbench-")
+    engine = make_engine(f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+    seed(engine)
+    seed_orders(engine, orders=orders)
+    RoundTripCounter(engine, rtt_ms=rtt_ms)
+
+    main = load_app(engine, FakeMongoDB())
+    main.outbound.post = _fake_translate_post(upstream_ms)
+    main.get_translate_key = lambda: "bench"
+    cookie = main.app.session_interface.get_signing_serializer(main.app).dumps(
+        {"email": "user1@example.com", "user_id": 1, "uid": "bench"}
+    )
+
+    results = {"config": {"clients": clients, "threads": threads, "duration": duration,
+                          "upstream_ms": upstream_ms, "rtt_ms": rtt_ms}}
+    try:
+        for model in models:
+            server, base_url = _serve(main, model, threads)
+            try:
+                results[model] = _drive(base_url, cookie, clients, duration, orders)
+            finally:
+                server.shutdown()
+                server.server_close()
+    finally:
+        main.event_writer.flush()
+        engine.dispose()
+        shutil.rmtree(db_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="concurrent HTTP clients")
+    parser.add_argument("--threads", type=int, default=8, help="threads in the gthread-style server")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--upstream-ms", type=float, default=50.0, help="fake Translation API latency")
+    parser.add_argument("--rtt-ms", type=float, default=2.0, help="fake DB latency per statement")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = run(args.clients, args.threads, args.duration, args.upstream_ms, args.rtt_ms)
+    for model in ("sync", "gthread"):
+        print(f"\n== {model} ==")
+        report.print_table(results[model])
+    sync_rps = results["sync"]["total"].get("rps") or 0
+    threaded_rps = results["gthread"]["total"].get("rps") or 0
+    if sync_rps:
+        print(f"\ngthread x{args.threads}: {threaded_rps} req/s vs sync {sync_rps} req/s "
+              f"({threaded_rps / sync_rps:.1f}x)")
+    if args.json:
+        report.save(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Offline load test for the ordering API.
+
+    python -m benchmarks.load_test --mix lunch --concurrency 8 --duration 10 --json run.json
+    python -m benchmarks.load_test --mix lunch --compare run.json
+
+Seeds a SQLite database and an in-memory Mongo stand-in, stubs Firebase and
+Secret Manager the same way tests/conftest.py does, then drives a weighted mix
+of requests from several threads. Prints req/s and p50/p95/p99 per endpoint and
+can write the results as JSON to compare between commits.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks import report
+from benchmarks.localdb import FakeMongoDB, RoundTripCounter, make_engine, seed, seed_orders
+from benchmarks.stubs import load_app, login
+
+# Traffic mixes: request name -> relative weight (see _request for each call)
+MIXES = {
+    "browse": {
+        "menu": 60, "my_orders": 20, "order_history": 10, "order_detail": 8, "checkout": 2,
+    },
+    "lunch": {
+        "menu": 40, "checkout": 30, "my_orders": 15, "order_history": 5, "order_detail": 5, "admin_orders": 5,
+    },
+    "admin": {
+        "admin_orders": 70, "menu": 20, "checkout": 10,
+    },
+}
+
+
+def _request(name, client, admin_client, rng, user_id, state):
+    if name == "menu":
+        return client.get("/api/menu")
+    if name == "checkout":
+        items = [{"menu_id": rng.randint(1, state["menu_items"]), "quantity": rng.randint(1, 3)}
+                 for _ in range(rng.randint(1, 6))]
+        return client.post("/api/order", json={"items": items})
+    if name == "my_orders":
+        return client.get("/api/orders")
+    if name == "order_history":
+        return client.get("/api/orders/history")
+    if name == "order_detail":
+        # Seeded orders are assigned round-robin, so this id belongs to user_id
+        order_id = user_id + state["users"] * rng.randint(0, state["orders"] // state["users"] - 1)
+        return client.get(f"/api/order/{order_id}")
+    if name == "admin_orders":
+        return admin_client.get("/api/admin/orders")
+    raise ValueError(name)
+
+
+def run(mix="lunch", concurrency=4, duration=10.0, menu_items=40, users=50, orders=5000,
+        rtt_ms=0.0, seed_value=1):
+    db_dir = tempfile.mkdtemp(prefix="loadtest-")
+    engine = make_engine(f"sqlite:///{os.path.join(db_dir, 'bench.db')}")
+    seed(engine, menu_items=menu_items, users=users)
+    seed_orders(engine, orders=orders, users=users, menu_items=menu_items)
+    if rtt_ms:
+        RoundTripCounter(engine, rtt_ms=rtt_ms)
+
+    main = load_app(engine, FakeMongoDB())
+    state = {"menu_items": menu_items, "users": users, "orders": orders}
+    weights = MIXES[mix]
+    names, cum = list(weights), list(weights.values())
+
+    timings = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(idx):
+        rng = random.Random(seed_value + idx)
+        user_id = 1 + idx % users
+        client = main.app.test_client()
+        login(client, email=f"user{user_id}@example.com", user_id=user_id, uid=f"u{user_id}")
+        admin_client = main.app.test_client()
+        login(admin_client, email="admin@example.com", user_id=1, uid="admin")
+
+        local_t, local_e = defaultdict(list), defaultdict(int)
+        while time.monotonic() < stop_at:
+            name = rng.choices(names, weights=cum)[0]
+            start = time.perf_counter()
+            res = _request(name, client, admin_client, rng, user_id, state)
+            local_t[name].append((time.perf_counter() - start) * 1000)
+            if res.status_code >= 400:
+                local_e[name] += 1
+
+        with lock:
+            for name, samples in local_t.items():
+                timings[name].extend(samples)
+            for name, n in local_e.items():
+                errors[name] += n
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    main.event_writer.flush()
+    main.sales_rollups.flush()
+    engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    all_samples = [s for samples in timings.values() for s in samples]
+    return {
+        "config": {"mix": mix, "concurrency": concurrency, "duration": duration,
+                   "menu_items": menu_items, "users": users, "orders": orders, "rtt_ms": rtt_ms},
+        "total": report.summarize(all_samples, sum(errors.values()), elapsed),
+        "endpoints": {name: report.summarize(timings[name], errors[name], elapsed)
+                      for name in names if timings[name]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mix", choices=sorted(MIXES), default="lunch")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--menu-items", type=int, default=40)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="fake DB latency per statement")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    results = run(args.mix, args.concurrency, args.duration, args.menu_items,
+                  args.users, args.orders, args.rtt_ms, args.seed)
+
+    report.print_table(results, report.load(args.compare) if args.compare else None)
+    total = results["total"]
+    print(f"\ntotal: {total['requests']} requests, {total.get('rps', 0)} req/s, "
+          f"p95 {total.get('p95_ms', 0)} ms, {total['errors']} errors")
+    if args.json:
+        report.save(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
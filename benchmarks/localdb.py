@@ -0,0 +1,232 @@
+import time
+
+from bson import ObjectId
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+
+from migrate import apply_migrations
+import order_items
+
+# SQLite stand-in for the Cloud SQL schema (same table/column names)
+SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL UNIQUE,
+        name TEXT
+    )
+    """,
+    """
+    CREATE TABLE menu (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        price NUMERIC NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        total NUMERIC NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        hidden_from_admin INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        menu_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL
+    )
+    """,
+]
+
+
+def make_engine(url="sqlite://"):
+    if url == "sqlite://":
+        # StaticPool keeps a single in-memory database shared by every connection
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        # File database: a real pool, so concurrent load-test threads each get
+        # their own connection (writers wait on SQLite's lock up to 30s)
+        engine = create_engine(url, connect_args={"check_same_thread": False, "timeout": 30})
+    with engine.begin() as conn:
+        for stmt in SCHEMA:
+            conn.execute(text(stmt))
+    # Indexes and later columns come from the same migrations production runs
+    apply_migrations(engine, log=lambda msg: None)
+    return engine
+
+
+def seed(engine, menu_items=20, users=5):
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO menu (name, price) VALUES (:name, :price)"),
+            [{"name": f"Item {i}", "price": round(2.5 + (i % 12) * 0.75, 2)}
+             for i in range(1, menu_items + 1)]
+        )
+        conn.execute(
+            text("INSERT INTO users (email, name) VALUES (:email, :name)"),
+            [{"email": f"user{i}@example.com", "name": f"User {i}"}
+             for i in range(1, users + 1)]
+        )
+
+
+def seed_orders(engine, orders=1000, users=5, menu_items=20, max_lines=4):
+    # Bulk history so listing endpoints have something realistic to page through
+    statuses = ("pending", "confirmed", "completed")
+    with engine.begin() as conn:
+        first_id = (conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM orders")).scalar() or 0) + 1
+        conn.execute(
+            text("""
+                INSERT INTO orders (id, user_id, total, status, created_at)
+                VALUES (:id, :user_id, :total, :status, :created_at)
+            """),
+            [{"id": first_id + i,
+              "user_id": 1 + i % users,
+              "total": 10.0,
+              "status": statuses[i % 3],
+              "created_at": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00"}
+             for i in range(orders)]
+        )
+        conn.execute(
+            text("INSERT INTO order_items (order_id, menu_id, quantity) VALUES (:order_id, :menu_id, :quantity)"),
+            [{"order_id": first_id + i, "menu_id": 1 + (i + j) % menu_items, "quantity": 1 + j % 3}
+             for i in range(orders) for j in range(1 + i % max_lines)]
+        )
+    # Written like pre-005 history, then priced the way production was
+    order_items.backfill(engine, log=lambda msg: None)
+
+
+class RoundTripCounter:
+    # Counts statements sent to the database; optionally adds a fake network RTT
+    def __init__(self, engine, rtt_ms=0.0):
+        self.count = 0
+        self.rtt_ms = rtt_ms
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        if self.rtt_ms:
+            time.sleep(self.rtt_ms / 1000.0)
+
+    def reset(self):
+        self.count = 0
+
+
+# Minimal in-memory replacement for the pymongo calls the app makes
+_OPERATORS = {
+    "$in": lambda v, arg: v in arg,
+    "$lt": lambda v, arg: v is not None and v < arg,
+    "$lte": lambda v, arg: v is not None and v <= arg,
+    "$gt": lambda v, arg: v is not None and v > arg,
+    "$gte": lambda v, arg: v is not None and v >= arg,
+}
+
+
+def _matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and cond and all(op in _OPERATORS for op in cond):
+            if not all(_OPERATORS[op](value, arg) for op, arg in cond.items()):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _project(doc, projection):
+    if not projection:
+        return dict(doc)
+    included = {k for k, v in projection.items() if v and k != "_id"}
+    if included:
+        out = {k: v for k, v in doc.items() if k in included}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: v for k, v in doc.items() if projection.get(k, 1)}
+
+
+class FakeCursor:
+    # Projection is applied last, so sorting on a projected-out field works
+    def __init__(self, docs, projection=None):
+        self._docs = list(docs)
+        self._projection = projection
+
+    def sort(self, key, direction=1):
+        self._docs.sort(key=lambda d: d.get(key), reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        if n:
+            self._docs = self._docs[:n]
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __iter__(self):
+        return (_project(d, self._projection) for d in self._docs)
+
+
+class FakeCollection:
+    def __init__(self, **options):
+        self.docs = []
+        self._options = options
+
+    def options(self):
+        return dict(self._options)
+
+    def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(dict(doc))
+
+    def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            self.insert_one(doc)
+
+    def find(self, query=None, projection=None):
+        query = query or {}
+        return FakeCursor((d for d in self.docs if _matches(d, query)), projection)
+
+    def count_documents(self, query):
+        return sum(1 for d in self.docs if _matches(d, query))
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def create_index(self, keys, **kwargs):
+        self.indexes = getattr(self, "indexes", [])
+        self.indexes.append((keys, kwargs))
+        return kwargs.get("name", str(keys))
+
+
+class FakeMongoDB:
+    def __init__(self):
+        self._collections = {}
+
+    def __getitem__(self, name):
+        return self._collections.setdefault(name, FakeCollection())
+
+    def list_collection_names(self):
+        return list(self._collections)
+
+    def create_collection(self, name, **options):
+        from pymongo.errors import CollectionInvalid
+
+        if name in self._collections:
+            raise CollectionInvalid(f"collection {name} already exists")
+        self._collections[name] = FakeCollection(**options)
+        return self._collections[name]
+
+    def command(self, name, value, **kwargs):
+        if name == "convertToCapped":
+            self._collections[value]._options.update(capped=True, size=kwargs.get("size"))
+            return {"ok": 1}
+        raise NotImplementedError(name)
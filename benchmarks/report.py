@@ -0,0 +1,43 @@
+import json
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def summarize(timings_ms, errors, elapsed_s):
+    # timings_ms: latencies for one endpoint; elapsed_s: wall time of the whole run
+    if not timings_ms:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(timings_ms),
+        "errors": errors,
+        "rps": round(len(timings_ms) / elapsed_s, 1),
+        "p50_ms": round(percentile(timings_ms, 50), 2),
+        "p95_ms": round(percentile(timings_ms, 95), 2),
+        "p99_ms": round(percentile(timings_ms, 99), 2),
+    }
+
+
+def print_table(results, baseline=None):
+    print(f"{'endpoint':<24} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for name, r in results["endpoints"].items():
+        line = (f"{name:<24} {r['requests']:>6} {r['errors']:>4} {r.get('rps', 0):>8} "
+                f"{r.get('p50_ms', 0):>8} {r.get('p95_ms', 0):>8} {r.get('p99_ms', 0):>8}")
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base and base.get("p95_ms") and r.get("p95_ms"):
+            delta = (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+            line += f"   p95 {delta:+.1f}% vs baseline"
+        print(line)
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,71 @@
+import os
+import sys
+import types
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+# Firebase and Secret Manager fakes so main can be imported without GCP
+# access. tests/conftest.py installs these too.
+def install_cloud_stubs():
+    fake_firebase_admin = types.ModuleType("firebase_admin")
+    fake_firebase_admin._apps = [object()]  # makes "if not firebase_admin._apps" false
+    fake_fb_auth = types.ModuleType("firebase_admin.auth")
+    fake_fb_credentials = types.ModuleType("firebase_admin.credentials")
+    fake_firebase_admin.auth = fake_fb_auth
+    fake_firebase_admin.credentials = fake_fb_credentials
+
+    sys.modules["firebase_admin"] = fake_firebase_admin
+    sys.modules["firebase_admin.auth"] = fake_fb_auth
+    sys.modules["firebase_admin.credentials"] = fake_fb_credentials
+
+    class FakePayload:
+        def __init__(self, s: str):
+            self.data = s.encode("utf-8")
+
+    class FakeAccessResp:
+        def __init__(self, s: str):
+            self.payload = FakePayload(s)
+
+    class FakeSecretManagerClient:
+        def access_secret_version(self, *args, **kwargs):
+            request = kwargs.get("request")
+            name = kwargs.get("name")
+            if request and isinstance(request, dict):
+                name = request.get("name", name)
+            name = name or ""
+            # Return harmless strings
+            if "TRANSLATE_API_KEY" in name:
+                return FakeAccessResp("fake-translate-key")
+            return FakeAccessResp("fake")
+
+    fake_secretmanager = types.ModuleType("google.cloud.secretmanager")
+    fake_secretmanager.SecretManagerServiceClient = FakeSecretManagerClient
+
+    sys.modules["google"] = types.ModuleType("google")
+    sys.modules["google.cloud"] = types.ModuleType("google.cloud")
+    sys.modules["google.cloud.secretmanager"] = fake_secretmanager
+
+
+def load_app(engine, mongo_db):
+    os.environ.setdefault("FLASK_SECRET_KEY", "bench")
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "bench-project")
+    os.environ.setdefault("ADMIN_EMAIL", "admin@example.com")
+    install_cloud_stubs()
+    import main
+
+    main.mysql_engine = engine
+    main.mongo_db = mongo_db
+    # A handful of synthetic users would hit the per-user limits at once
+    main.admission_control.enabled = False
+    main.app.config["TESTING"] = True
+    return main
+
+
+def login(client, email="user1@example.com", user_id=1, uid="bench"):
+    with client.session_transaction() as sess:
+        sess["email"] = email
+        sess["user_id"] = user_id
+        sess["uid"] = uid
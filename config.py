@@ -1,12 +1,14 @@
-import os
-from google.cloud import secretmanager
+import startup
+from secrets_provider import secrets
 
 def get_secret(secret_name):
-    client = secretmanager.SecretManagerServiceClient()
-    project_id = os.environ.get("GOOGLE_CLOUD_PROJECT", "systems-design-assignment")
-    name = f"projects/{project_id}/secrets/{secret_name}/versions/latest"
-    response = client.access_secret_version(name=name)
-    return response.payload.data.decode("utf-8")
+    return secrets.get(secret_name)
+
+# Everything db.py needs, fetched concurrently through one client
+REQUIRED_SECRETS = ["DB_USER", "DB_PASS", "DB_NAME", "INSTANCE_CONNECTION_NAME", "MONGO_URI"]
+
+with startup.timed("config.secrets"):
+    secrets.prefetch(REQUIRED_SECRETS)
 
 # Cloud SQL settings
 DB_USER = get_secret("DB_USER")
@@ -1,13 +1,352 @@
-from sqlalchemy import create_engine
-from pymongo import MongoClient
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from pymongo import MongoClient, monitoring
+
 from config import DB_USER, DB_PASS, DB_NAME, INSTANCE_CONNECTION_NAME, MONGO_URI
+from metrics import Histogram
+import startup
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name) or default)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Pool sizing. Each gunicorn worker is its own process with its own pools, so
+# the defaults give one connection per worker thread plus a little headroom.
+WORKER_THREADS = _env_int("GUNICORN_THREADS", 1)
+
+MYSQL_POOL_SIZE = _env_int("MYSQL_POOL_SIZE", max(2, WORKER_THREADS))
+MYSQL_MAX_OVERFLOW = _env_int("MYSQL_MAX_OVERFLOW", 2)
+MYSQL_POOL_TIMEOUT = _env_int("MYSQL_POOL_TIMEOUT", 10)
+# Cloud SQL drops idle connections; recycle well before that and ping on checkout
+MYSQL_POOL_RECYCLE = _env_int("MYSQL_POOL_RECYCLE", 1800)
+MYSQL_POOL_PRE_PING = _env_bool("MYSQL_POOL_PRE_PING", True)
+
+MONGO_MAX_POOL_SIZE = _env_int("MONGO_MAX_POOL_SIZE", max(4, WORKER_THREADS * 2))
+MONGO_MIN_POOL_SIZE = _env_int("MONGO_MIN_POOL_SIZE", 0)
+MONGO_MAX_IDLE_MS = _env_int("MONGO_MAX_IDLE_MS", 300000)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000)
+
+
+class MySQLPoolStats:
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+
+
+class TimedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a connection,
+    # per pool so the primary and the replica are reported separately
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = MySQLPoolStats()
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep counting into the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.checkout_wait.observe(time.perf_counter() - start)
+
+
+class MongoPoolStats(monitoring.ConnectionPoolListener):
+    # pymongo fires these synchronously on the calling thread, so a thread-local
+    # is enough to pair "check out started" with "checked out"
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self._started = threading.local()
+        self._lock = threading.Lock()
+
+    def connection_check_out_started(self, event):
+        self._started.at = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self._observe_wait()
+        with self._lock:
+            self.checked_out += 1
+
+    def connection_check_out_failed(self, event):
+        self._observe_wait()
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def _observe_wait(self):
+        start = getattr(self._started, "at", None)
+        if start is not None:
+            self.checkout_wait.observe(time.perf_counter() - start)
+            self._started.at = None
+
+    # Remaining listener hooks we don't need
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+mongo_pool_stats = MongoPoolStats()
+
+# MySQL (Cloud SQL). create_engine does not connect, so this is cheap at import.
+def _mysql_engine(instance_connection_name: str):
+    return create_engine(
+        f"mysql+pymysql://{DB_USER}:{DB_PASS}@/{DB_NAME}"
+        f"?unix_socket=/cloudsql/{instance_connection_name}",
+        poolclass=TimedQueuePool,
+        pool_size=MYSQL_POOL_SIZE,
+        max_overflow=MYSQL_MAX_OVERFLOW,
+        pool_timeout=MYSQL_POOL_TIMEOUT,
+        pool_recycle=MYSQL_POOL_RECYCLE,
+        pool_pre_ping=MYSQL_POOL_PRE_PING,
+    )
+
+
+with startup.timed("db.mysql_engine"):
+    mysql_engine = _mysql_engine(INSTANCE_CONNECTION_NAME)
+
+# Optional Cloud SQL read replica (its instance connection name); None means
+# every read goes to the primary
+MYSQL_REPLICA_INSTANCE = os.getenv("MYSQL_REPLICA_INSTANCE")
+mysql_read_engine = _mysql_engine(MYSQL_REPLICA_INSTANCE) if MYSQL_REPLICA_INSTANCE else None
+
+
+def replica_lag_seconds(conn):
+    # Seconds the replica is behind, 0 for a server that isn't replicating,
+    # None if replication is broken
+    if conn.dialect.name != "mysql":
+        return 0
+    try:
+        row = conn.execute(text("SHOW REPLICA STATUS")).mappings().fetchone()
+        key = "Seconds_Behind_Source"
+    except DBAPIError:  # MySQL < 8.0.22
+        row = conn.execute(text("SHOW SLAVE STATUS")).mappings().fetchone()
+        key = "Seconds_Behind_Master"
+    if row is None:
+        return 0
+    return row[key]
+
+
+class ReadRouter:
+    # Picks the engine for a read. Reads go to the replica unless:
+    #  - the caller just wrote (sticky=True), so it must see its own write
+    #  - the replica was last seen more than max_lag seconds behind
+    #  - the replica failed recently (retried after retry_after seconds)
+    # Lag is checked at most every check_interval seconds, by whichever
+    # request gets there first; the others use the last answer.
+    def __init__(self, get_writer, get_reader, max_lag: float = 5.0, check_interval: float = 2.0,
+                 retry_after: float = 30.0, lag_check=replica_lag_seconds, logger=None):
+        self._get_writer = get_writer
+        self._get_reader = get_reader
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.lag_check = lag_check
+        self._logger = logger
+        self._lag = None
+        self._checked_at = 0.0
+        self._down_until = 0.0
+        self._check_lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.counts = {"replica": 0, "primary_sticky": 0, "primary_lagging": 0,
+                       "primary_down": 0, "primary_no_replica": 0}
+
+    def _bump(self, key: str):
+        with self._counts_lock:
+            self.counts[key] += 1
+
+    def mark_down(self, reason=None):
+        self._down_until = time.monotonic() + self.retry_after
+        if self._logger:
+            self._logger.warning("Read replica unavailable, using primary: %s", reason)
+
+    def _replica_ok(self, reader) -> bool:
+        now = time.monotonic()
+        if now < self._down_until:
+            self._bump("primary_down")
+            return False
+        if now - self._checked_at >= self.check_interval and self._check_lock.acquire(blocking=False):
+            try:
+                with reader.connect() as conn:
+                    self._lag = self.lag_check(conn)
+            except Exception as e:
+                self._lag = None
+                self.mark_down(e)
+            finally:
+                self._checked_at = time.monotonic()
+                self._check_lock.release()
+        if self._lag is None or self._lag > self.max_lag:
+            self._bump("primary_down" if time.monotonic() < self._down_until else "primary_lagging")
+            return False
+        return True
+
+    def reader(self, sticky: bool = False):
+        reader = self._get_reader()
+        if reader is None or reader is self._get_writer():
+            self._bump("primary_no_replica")
+            return self._get_writer()
+        if sticky:
+            self._bump("primary_sticky")
+            return self._get_writer()
+        if not self._replica_ok(reader):
+            return self._get_writer()
+        self._bump("replica")
+        return reader
+
+    @contextmanager
+    def connect(self, sticky: bool = False):
+        # Read-only connection; a replica that refuses the connection is
+        # marked down and the primary used instead
+        engine = self.reader(sticky)
+        try:
+            conn = engine.connect()
+        except DBAPIError as e:
+            if engine is self._get_writer():
+                raise
+            self.mark_down(e)
+            conn = self._get_writer().connect()
+        with conn:
+            yield conn
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            out = dict(self.counts)
+        out["replica_configured"] = self._get_reader() is not None
+        out["replica_lag_seconds"] = self._lag
+        out["replica_down"] = time.monotonic() < self._down_until
+        return out
+
+
+# MongoDB (Atlas). MongoClient resolves the SRV record and starts monitor
+# threads, so it is built on first use instead of during cold start.
+_mongo_client = None
+_mongo_lock = threading.Lock()
+
+
+def get_mongo_client() -> MongoClient:
+    global _mongo_client
+    if _mongo_client is None:
+        with _mongo_lock:
+            if _mongo_client is None:
+                with startup.timed("db.mongo_client"):
+                    _mongo_client = MongoClient(
+                        MONGO_URI,
+                        maxPoolSize=MONGO_MAX_POOL_SIZE,
+                        minPoolSize=MONGO_MIN_POOL_SIZE,
+                        maxIdleTimeMS=MONGO_MAX_IDLE_MS,
+                        waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                        event_listeners=[mongo_pool_stats],
+                    )
+    return _mongo_client
+
+
+class LazyMongoDatabase:
+    # Stands in for mongo_client["restaurant_app"] until something touches it
+    def __init__(self, name: str):
+        self._name = name
+
+    def _db(self):
+        return get_mongo_client()[self._name]
+
+    def __getitem__(self, collection):
+        return self._db()[collection]
+
+    def __getattr__(self, attr):
+        return getattr(self._db(), attr)
+
+
+mongo_db = LazyMongoDatabase("restaurant_app")
+
+
+def _mysql_pool_stats(engine) -> dict:
+    pool = engine.pool
+    return {
+        "pool_size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "timeouts": pool.stats.timeouts,
+        "checkout_wait": pool.stats.checkout_wait.snapshot(),
+    }
+
+
+def pool_stats() -> dict:
+    stats = {
+        "mysql": _mysql_pool_stats(mysql_engine),
+        "mongo": {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "min_pool_size": MONGO_MIN_POOL_SIZE,
+            "open_connections": mongo_pool_stats.open_connections,
+            "checked_out": mongo_pool_stats.checked_out,
+            "checkout_failures": mongo_pool_stats.checkout_failures,
+            "checkout_wait": mongo_pool_stats.checkout_wait.snapshot(),
+        },
+    }
+    if mysql_read_engine is not None:
+        stats["mysql_replica"] = _mysql_pool_stats(mysql_read_engine)
+    return stats
+
+
+def log_pool_stats(logger):
+    # One-line JSON dump of pool_stats() for log-based dashboards
+    try:
+        logger.info("pool_stats %s", json.dumps(pool_stats()))
+    except Exception:
+        logger.exception("pool_stats logging failed")
+
 
-# MySQL (Cloud SQL)
-mysql_engine = create_engine(
-    f"mysql+pymysql://{DB_USER}:{DB_PASS}@/{DB_NAME}"
-    f"?unix_socket=/cloudsql/{INSTANCE_CONNECTION_NAME}"
-)
+def start_pool_stats_logger(logger, interval: float):
+    def run():
+        while True:
+            time.sleep(interval)
+            log_pool_stats(logger)
 
-# MongoDB (Atlas)
-mongo_client = MongoClient(MONGO_URI)
-mongo_db = mongo_client["restaurant_app"]
+    thread = threading.Thread(target=run, name="pool-stats-logger", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,144 @@
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+
+class EventWriter:
+    # Background writer for order_logs documents and audit events. Requests only
+    # pay for a queue put; a worker thread batches the actual I/O into
+    # insert_many calls and audit POSTs. When the queue is full the event is
+    # dropped and counted rather than blocking checkout.
+    def __init__(self, get_collection, send_audit_batch, max_queue: int = 10000,
+                 batch_size: int = 100, flush_interval: float = 0.5, logger=None):
+        self._get_collection = get_collection
+        self._send_audit_batch = send_audit_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._logger = logger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._counts = {
+            "enqueued": 0,
+            "dropped": 0,
+            "logs_written": 0,
+            "logs_failed": 0,
+            "audits_sent": 0,
+            "audits_failed": 0,
+            "batches": 0,
+        }
+        self._counts_lock = threading.Lock()
+
+    def log(self, doc: dict) -> bool:
+        # `ts` is the event time (the TTL index, if any, keys off it)
+        doc.setdefault("ts", datetime.now(timezone.utc))
+        return self._put(("log", doc))
+
+    def audit(self, payload: dict) -> bool:
+        return self._put(("audit", payload))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        # Blocks until everything queued before this call has been written
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(("flush", done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        self._closed = True
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            out = dict(self._counts)
+        out["queued"] = self._queue.qsize()
+        return out
+
+    def _bump(self, key: str, n: int = 1):
+        with self._counts_lock:
+            self._counts[key] += n
+
+    def _put(self, item) -> bool:
+        if self._closed:
+            self._bump("dropped")
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._bump("dropped")
+            return False
+        self._bump("enqueued")
+        return True
+
+    def _ensure_started(self):
+        # Started lazily (and again after a fork) so gunicorn workers each get
+        # their own live thread
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        logs, audits, waiters = [], [], []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, value = self._queue.get(timeout=timeout)
+                if kind == "log":
+                    logs.append(value)
+                elif kind == "audit":
+                    audits.append(value)
+                else:
+                    waiters.append(value)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                pass
+
+            due = deadline is not None and time.monotonic() >= deadline
+            if waiters or due or len(logs) + len(audits) >= self.batch_size:
+                self._write(logs, audits)
+                for done in waiters:
+                    done.set()
+                logs, audits, waiters = [], [], []
+                deadline = None
+
+    def _write(self, logs, audits):
+        if logs:
+            try:
+                self._get_collection().insert_many(logs, ordered=False)
+                self._bump("logs_written", len(logs))
+            except Exception:
+                self._bump("logs_failed", len(logs))
+                if self._logger:
+                    self._logger.exception("order_logs batch insert failed")
+
+        if audits:
+            # send_audit_batch may return how many events it could not deliver;
+            # raising means none of them were
+            try:
+                failed = min(self._send_audit_batch(audits) or 0, len(audits))
+                self._bump("audits_sent", len(audits) - failed)
+                self._bump("audits_failed", failed)
+            except Exception:
+                self._bump("audits_failed", len(audits))
+                if self._logger:
+                    self._logger.exception("Audit log batch failed")
+
+        if logs or audits:
+            self._bump("batches")
@@ -0,0 +1,47 @@
+# gunicorn settings, all overridable from the environment (app.yaml).
+#
+# Every request spends most of its time waiting on Cloud SQL, Atlas, Firebase
+# or an outbound HTTP call, so the default is gthread: each worker process
+# serves GUNICORN_THREADS requests at once and a slow upstream only holds one
+# thread. GUNICORN_WORKER_CLASS=gevent (needs the gevent package) swaps the
+# threads for greenlets, up to GUNICORN_WORKER_CONNECTIONS per worker.
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+bind = f":{os.getenv('PORT', '8080')}"
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# With more than one worker, ORDER_EVENTS_BACKEND must be "mongo" (set in
+# app.yaml): otherwise an admin board only sees orders placed in the worker
+# holding its SSE connection, and stream ids from one worker mean nothing to
+# another. Each worker also has its own MySQL/Mongo pools and background
+# threads, multiplying Cloud SQL connections and memory, so the count is set
+# for the instance class in app.yaml rather than taken from the host's CPUs.
+workers = _env_int("GUNICORN_WORKERS", _env_int("WEB_CONCURRENCY", 1))
+threads = _env_int("GUNICORN_THREADS", 8)
+worker_connections = _env_int("GUNICORN_WORKER_CONNECTIONS", 100)
+
+# db.py sizes the MySQL/Mongo pools from GUNICORN_THREADS; workers inherit
+# this environment, so the pools match the concurrency configured here
+os.environ.setdefault("GUNICORN_THREADS", str(threads))
+
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE", 5)
+
+# Recycle workers now and then; jitter stops them all restarting together
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 2000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+# The app starts its background threads (event writer, key refresher, rollups)
+# lazily in each worker, so it must not be imported in the master
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
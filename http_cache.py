@@ -0,0 +1,161 @@
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import request
+
+try:
+    import brotli  # optional; gzip is used when it isn't installed
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/javascript", "text/html", "text/css",
+    "text/plain", "text/csv", "image/svg+xml",
+}
+
+# Static responses are read into memory to compress them; bigger files go as-is
+MAX_STATIC_COMPRESS_BYTES = 1024 * 1024
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class RouteBytes:
+    __slots__ = ("responses", "compressed", "not_modified", "bytes_in", "bytes_out")
+
+    def __init__(self):
+        self.responses = 0
+        self.compressed = 0
+        self.not_modified = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "responses": self.responses,
+            "compressed": self.compressed,
+            "not_modified": self.not_modified,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+        }
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def bytes_snapshot() -> dict:
+    with _routes_lock:
+        return {route: r.snapshot() for route, r in sorted(_routes.items())}
+
+
+def _record(route, size_in, size_out, not_modified=False):
+    with _routes_lock:
+        r = _routes.setdefault(route, RouteBytes())
+        r.responses += 1
+        r.not_modified += not_modified
+        if size_out < size_in:
+            r.compressed += 1
+        r.bytes_in += size_in
+        r.bytes_out += size_out
+
+
+def _pick_encoding(accept_encoding) -> str:
+    if brotli is not None and accept_encoding["br"]:
+        return "br"
+    if accept_encoding["gzip"]:
+        return "gzip"
+    return None
+
+
+def _weaken_etag(response):
+    # The compressed bytes differ from the identity ones, so a strong ETag
+    # would be wrong; conditional GETs compare weakly and still match
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+class StaticVersions:
+    # Content hash per static file, for cache-busting ?v= URLs. Recomputed
+    # when the file's mtime changes, so edits in development show up.
+    def __init__(self, folder):
+        self.folder = folder
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str):
+        path = os.path.join(self.folder, filename)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        cached = self._hashes.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (mtime, digest)
+        return digest
+
+
+def init_app(app, min_size: int = 1024, level: int = 6):
+    versions = StaticVersions(app.static_folder)
+
+    @app.url_defaults
+    def _version_static_urls(endpoint, values):
+        if endpoint == "static" and "v" not in values:
+            digest = versions.get(values.get("filename", ""))
+            if digest:
+                values["v"] = digest
+
+    @app.after_request
+    def _optimize_response(response):
+        route = f"{request.method} {request.url_rule.rule}" if request.url_rule else "<unmatched>"
+
+        if request.endpoint == "static":
+            if request.args.get("v"):
+                response.headers["Cache-Control"] = IMMUTABLE
+        elif response.mimetype == "text/html" and "Cache-Control" not in response.headers:
+            # Pages embed the session's user; always revalidate
+            response.headers["Cache-Control"] = "private, no-cache"
+
+        if response.status_code == 304:
+            _record(route, 0, 0, not_modified=True)
+            return response
+        if response.status_code != 200 or "Content-Encoding" in response.headers:
+            return response
+        if response.direct_passthrough:
+            # send_file: only small static assets are worth reading in
+            if request.endpoint != "static" or (response.content_length or 0) > MAX_STATIC_COMPRESS_BYTES:
+                return response
+            response.direct_passthrough = False
+            response.headers.pop("Accept-Ranges", None)
+        elif response.is_streamed:
+            return response
+
+        data = response.get_data()
+        size = len(data)
+        if size < min_size or response.mimetype not in COMPRESSIBLE_TYPES:
+            _record(route, size, size)
+            return response
+
+        # Shared caches must key on the encoding even when we send identity
+        response.vary.add("Accept-Encoding")
+        encoding = _pick_encoding(request.accept_encodings)
+        if encoding is None:
+            _record(route, size, size)
+            return response
+
+        if encoding == "br":
+            body = brotli.compress(data, quality=min(level, 11))
+        else:
+            body = gzip.compress(data, compresslevel=level, mtime=0)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        _weaken_etag(response)
+        _record(route, size, len(body))
+        return response
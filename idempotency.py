@@ -0,0 +1,156 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+MAX_KEY_LENGTH = 128
+
+
+class KeyAlreadyUsed(Exception):
+    pass
+
+
+def request_hash(payload) -> str:
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class IdempotencyStore:
+    # Idempotency-Key support for checkout. The key is claimed inside the order
+    # transaction and the response stored before commit, so a retry either
+    # finds the finished response or waits on the row lock for it. Responses
+    # are also kept in a local LRU so same-worker replays skip the database,
+    # and same-worker duplicates queue on a per-key lock.
+    # Rows older than `retention` seconds are deleted by purge(), which each
+    # worker runs in the background at most every `purge_interval` seconds;
+    # a retry after that creates a new order.
+    def __init__(self, get_engine, cache_size: int = 10000, ttl: float = 86400.0,
+                 retention: float = 86400.0, purge_interval: float = 3600.0, logger=None):
+        self._get_engine = get_engine
+        self.cache_size = cache_size
+        self.ttl = min(ttl, retention)
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._logger = logger
+        self._next_purge = time.monotonic() + purge_interval
+        self._cache = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.purged = 0
+
+    @contextmanager
+    def local_lock(self, user_id, key):
+        k = (user_id, key)
+        with self._lock:
+            entry = self._locks.setdefault(k, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(k, None)
+
+    def cached(self, user_id, key):
+        # -> (status_code, body, request_hash) or None
+        with self._lock:
+            entry = self._cache.get((user_id, key))
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[0]
+
+    def remember(self, user_id, key, stored):
+        with self._lock:
+            self._cache[(user_id, key)] = (stored, time.monotonic() + self.ttl)
+            self._cache.move_to_end((user_id, key))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def claim(self, conn, user_id, key, req_hash):
+        # First statement of the order transaction
+        try:
+            conn.execute(
+                text("""
+                    INSERT INTO idempotency_keys (user_id, idem_key, request_hash)
+                    VALUES (:user_id, :key, :hash)
+                """),
+                {"user_id": user_id, "key": key, "hash": req_hash}
+            )
+        except IntegrityError:
+            raise KeyAlreadyUsed()
+
+    def complete(self, conn, user_id, key, status_code, body):
+        # Last statement of the order transaction; call remember() after commit
+        conn.execute(
+            text("""
+                UPDATE idempotency_keys SET status_code = :status, response_body = :body
+                WHERE user_id = :user_id AND idem_key = :key
+            """),
+            {"status": status_code, "body": body, "user_id": user_id, "key": key}
+        )
+
+    def lookup(self, user_id, key):
+        with self._get_engine().connect() as conn:
+            row = conn.execute(
+                text("""
+                    SELECT status_code, response_body, request_hash
+                    FROM idempotency_keys
+                    WHERE user_id = :user_id AND idem_key = :key
+                """),
+                {"user_id": user_id, "key": key}
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        stored = (row[0], row[1], row[2])
+        self.remember(user_id, key, stored)
+        return stored
+
+    def purge(self) -> int:
+        # Uses idx_idempotency_keys_created (migration 007)
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=self.retention)
+        with self._get_engine().begin() as conn:
+            deleted = conn.execute(
+                text("DELETE FROM idempotency_keys WHERE created_at < :cutoff"),
+                {"cutoff": cutoff.strftime("%Y-%m-%d %H:%M:%S")}
+            ).rowcount
+        self.purged += deleted
+        return deleted
+
+    def maybe_purge(self):
+        # Called after keyed checkouts; never blocks or fails the request
+        if time.monotonic() < self._next_purge:
+            return
+        with self._lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.purge_interval
+        threading.Thread(target=self._purge_logged, name="idempotency-purge", daemon=True).start()
+
+    def _purge_logged(self):
+        try:
+            self.purge()
+        except Exception:
+            if self._logger:
+                self._logger.exception("Idempotency key purge failed")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["purge"] or len(sys.argv) > 3:
+        print("usage: python -m idempotency purge [retention_hours]")
+        sys.exit(2)
+
+    from db import mysql_engine
+
+    hours = float(sys.argv[2]) if len(sys.argv) == 3 else 24
+    print(f"deleted {IdempotencyStore(lambda: mysql_engine, retention=hours * 3600).purge()} keys")
+    sys.exit(0)
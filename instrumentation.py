@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import Histogram
+
+# Per-request counters; None outside a request (e.g. background threads)
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestStats:
+    __slots__ = ("start", "sql_count", "sql_ms", "mongo_count", "mongo_ms", "ext_count", "ext_ms")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.mongo_count = 0
+        self.mongo_ms = 0.0
+        self.ext_count = 0
+        self.ext_ms = 0.0
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.latency = Histogram()
+        self.sql_time = Histogram()
+        self.mongo_time = Histogram()
+        self.ext_time = Histogram()
+        self.sql_queries = Histogram(buckets_ms=(1, 2, 3, 5, 10, 20, 50, 100), unit="")
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "latency": self.latency.snapshot(),
+            "sql_time": self.sql_time.snapshot(),
+            "sql_queries": self.sql_queries.snapshot(),
+            "mongo_time": self.mongo_time.snapshot(),
+            "external_time": self.ext_time.snapshot(),
+        }
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def _route_metrics(route: str) -> RouteMetrics:
+    m = _routes.get(route)
+    if m is None:
+        with _routes_lock:
+            m = _routes.setdefault(route, RouteMetrics())
+    return m
+
+
+def route_snapshot() -> dict:
+    return {route: m.snapshot() for route, m in sorted(_routes.items())}
+
+
+def reset():
+    with _routes_lock:
+        _routes.clear()
+
+
+def current() -> RequestStats:
+    return _current.get()
+
+
+# SQLAlchemy: every engine, including ones created later (tests, replicas)
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get("_query_start")
+    if stats is not None and starts:
+        stats.sql_count += 1
+        stats.sql_ms += (time.perf_counter() - starts.pop()) * 1000.0
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    starts = exception_context.connection.info.get("_query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    # Command events are published on the thread that ran the command, so the
+    # request's ContextVar is visible here
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.mongo_count += 1
+            stats.mongo_ms += event.duration_micros / 1000.0
+
+
+# Must be registered before the MongoClient is built (db.py builds it lazily)
+monitoring.register(MongoCommandTimer())
+
+
+@contextmanager
+def external_call():
+    # Wrap outbound HTTP calls made on the request path
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.ext_count += 1
+            stats.ext_ms += (time.perf_counter() - start) * 1000.0
+
+
+def init_app(app, slow_ms: float = 500.0, log_all: bool = False):
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_token = _current.set(RequestStats())
+
+    @app.after_request
+    def _finish_request_metrics(response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.start) * 1000.0
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+
+        response.headers["Server-Timing"] = ", ".join([
+            f'db;dur={stats.sql_ms:.2f};desc="{stats.sql_count} queries"',
+            f'mongo;dur={stats.mongo_ms:.2f};desc="{stats.mongo_count} commands"',
+            f'ext;dur={stats.ext_ms:.2f};desc="{stats.ext_count} calls"',
+            f"total;dur={total_ms:.2f}",
+        ])
+
+        m = _route_metrics(f"{request.method} {route}")
+        with _routes_lock:
+            m.requests += 1  # gthread workers run requests concurrently
+        m.latency.observe(total_ms / 1000.0)
+        m.sql_time.observe(stats.sql_ms / 1000.0)
+        m.sql_queries.observe_value(stats.sql_count)
+        m.mongo_time.observe(stats.mongo_ms / 1000.0)
+        m.ext_time.observe(stats.ext_ms / 1000.0)
+
+        if log_all or total_ms >= slow_ms:
+            fields = {
+                "method": request.method,
+                "route": route,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 2),
+                "sql_queries": stats.sql_count,
+                "sql_ms": round(stats.sql_ms, 2),
+                "mongo_commands": stats.mongo_count,
+                "mongo_ms": round(stats.mongo_ms, 2),
+                "external_calls": stats.ext_count,
+                "external_ms": round(stats.ext_ms, 2),
+            }
+            log = app.logger.warning if total_ms >= slow_ms else app.logger.info
+            log("request_metrics %s", json.dumps(fields))
+        return response
+
+    @app.teardown_request
+    def _clear_request_metrics(exc):
+        token = g.pop("_metrics_token", None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                _current.set(None)  # streamed response finished in another context
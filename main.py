@@ -1,60 +1,276 @@
 import os
 import json
+import atexit
+import threading
+import time
+from datetime import datetime, timezone
 
-import requests
 import firebase_admin
 from firebase_admin import auth as fb_auth, credentials
-from google.cloud import secretmanager
-from sqlalchemy import text
-from flask import Flask, render_template, jsonify, request, session, redirect
-
-from db import mysql_engine, mongo_db
+from sqlalchemy import bindparam, text
+from flask import Flask, render_template, jsonify, request, session, redirect, stream_with_context
+
+import startup
+
+_import_started = time.perf_counter()
+
+import admission
+import analytics
+import http_cache
+import instrumentation
+import db
+from db import mysql_engine, mysql_read_engine, mongo_db
+from event_writer import EventWriter
+from idempotency import MAX_KEY_LENGTH, IdempotencyStore, KeyAlreadyUsed, request_hash
+from menu_cache import MenuCache
+import order_events
+import order_status
+import roles
+from roles import RoleResolver, upsert_user
+from secrets_provider import secrets
+from token_verifier import CachedTokenVerifier, SigningKeys, verify_firebase_token
+from translation import LRUTTLCache, TranslationError, TranslationService
+from order_events import MongoEventBackend, OrderEventBroadcaster, format_sse
+from order_export import EXPORT_FORMATS, csv_chunks, export_batches, ndjson_chunks
+from order_items import ITEM_COLUMNS
+from outbound import CircuitOpenError, OutboundClient
+from order_logs import DEFAULT_LOG_PAGE, LogQueryError, OrderLogs
+from pagination import (
+    PageArgsError, order_page_filters, order_page_suffix, parse_page_args, split_page
+)
 
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-not-for-prod")
 
-def send_audit_log(order_id: int, user_id: int, total):
+# app.logger otherwise inherits WARNING from the root logger and drops the
+# INFO lines (pool stats, startup timings, request metrics)
+app.logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+# Query counts/timings per request -> Server-Timing header, logs, /api/admin/metrics
+instrumentation.init_app(
+    app,
+    slow_ms=float(os.getenv("SLOW_REQUEST_MS", "500")),
+    log_all=bool(os.getenv("REQUEST_METRICS_LOG")),
+)
+
+# gzip/br above the threshold, bytes saved per route, versioned static URLs
+http_cache.init_app(
+    app,
+    min_size=int(os.getenv("COMPRESS_MIN_SIZE", "1024")),
+    level=int(os.getenv("COMPRESS_LEVEL", "6")),
+)
+
+if os.getenv("POOL_STATS_LOG_INTERVAL"):
+    db.start_pool_stats_logger(app.logger, float(os.environ["POOL_STATS_LOG_INTERVAL"]))
+
+idempotency_store = IdempotencyStore(
+    lambda: mysql_engine,
+    retention=float(os.getenv("IDEMPOTENCY_RETENTION_HOURS", "24")) * 3600,
+    logger=app.logger,
+)
+
+# Reads go to the MYSQL_REPLICA_INSTANCE replica while it keeps up; a user's
+# requests stay on the primary for READ_YOUR_WRITES_SECONDS after they write
+db_router = db.ReadRouter(
+    lambda: mysql_engine,
+    lambda: mysql_read_engine,
+    max_lag=float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(os.getenv("REPLICA_CHECK_INTERVAL", "2")),
+    retry_after=float(os.getenv("REPLICA_RETRY_SECONDS", "30")),
+    logger=app.logger,
+)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+def _wrote():
+    # The session cookie carries this, so any worker honours it
+    session["wrote_at"] = time.time()
+
+def read_connection():
+    sticky = time.time() - session.get("wrote_at", 0) < READ_YOUR_WRITES_SECONDS
+    return db_router.connect(sticky=sticky)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+menu_cache = MenuCache(app.json.dumps, ttl=float(os.getenv("MENU_CACHE_TTL", "30")))
+
+# Completed orders and their lines (priced as sold) never change again
+completed_orders = LRUTTLCache(
+    max_size=int(os.getenv("COMPLETED_ORDER_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("COMPLETED_ORDER_CACHE_TTL", "86400")),
+)
+
+# Keep-alive sessions + circuit breaker per host for the audit function and
+# the Translation API
+outbound = OutboundClient(
+    pool_size=int(os.getenv("OUTBOUND_POOL_SIZE", "10")),
+    retries=int(os.getenv("OUTBOUND_RETRIES", "1")),
+    failure_threshold=int(os.getenv("OUTBOUND_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("OUTBOUND_RESET_SECONDS", "30")),
+)
+
+def post_audit_batch(events) -> int:
+    # -> number of events not delivered (EventWriter counts the rest as sent)
     url = os.getenv("AUDIT_FUNCTION_URL")
     if not url:
+        return 0
+    # The audit function takes one event per POST unless it has been deployed
+    # with batch support, in which case the whole batch goes in one request
+    if os.getenv("AUDIT_BATCH_POSTS", "").lower() in ("1", "true", "yes"):
+        outbound.post(url, json={"events": events}, timeout=3).raise_for_status()
+        return 0
+    failed = 0
+    for event in events:
+        try:
+            outbound.post(url, json=event, timeout=3).raise_for_status()
+        except Exception as e:
+            failed += 1
+            app.logger.warning("Audit POST for order %s failed: %s", event.get("order_id"), e)
+    return failed
+
+event_writer = EventWriter(
+    lambda: mongo_db["order_logs"],
+    post_audit_batch,
+    max_queue=int(os.getenv("EVENT_QUEUE_SIZE", "10000")),
+    batch_size=int(os.getenv("EVENT_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("EVENT_FLUSH_INTERVAL", "0.5")),
+    logger=app.logger,
+)
+atexit.register(event_writer.close)
+
+# Daily revenue / status / item rollups behind /api/admin/analytics
+sales_rollups = analytics.RollupWriter(
+    lambda: mysql_engine,
+    flush_interval=float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "5")),
+    logger=app.logger,
+)
+atexit.register(sales_rollups.close)
+
+# Indexed, bounded reads of order_logs; ORDER_LOGS_TTL_DAYS adds a TTL index
+order_logs = OrderLogs(
+    lambda: mongo_db["order_logs"],
+    ttl_days=float(os.getenv("ORDER_LOGS_TTL_DAYS", "0")),
+    logger=app.logger,
+)
+
+# Admin board live updates; "mongo" shares events between gunicorn workers
+order_broadcaster = OrderEventBroadcaster(
+    backend=MongoEventBackend(lambda: mongo_db, logger=app.logger)
+    if os.getenv("ORDER_EVENTS_BACKEND") == "mongo" else None,
+    logger=app.logger,
+)
+
+# Per-user token buckets and a per-worker in-flight cap on checkout and
+# translate; ADMISSION_BACKEND=mongo shares the buckets between workers
+admission_control = admission.AdmissionController(
+    {
+        "checkout": admission.Limit(float(os.getenv("ORDER_RATE_PER_MIN", "20")),
+                                    int(os.getenv("ORDER_BURST", "10"))),
+        "translate": admission.Limit(float(os.getenv("TRANSLATE_RATE_PER_MIN", "120")),
+                                     int(os.getenv("TRANSLATE_BURST", "30"))),
+    },
+    max_inflight=int(os.getenv("ADMISSION_MAX_INFLIGHT", str(max(2, db.WORKER_THREADS * 3 // 4)))),
+    backend=admission.MongoBuckets(lambda: mongo_db, logger=app.logger)
+    if os.getenv("ADMISSION_BACKEND") == "mongo" else None,
+    queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5")),
+    enabled=os.getenv("ADMISSION_ENABLED", "true").lower() not in ("0", "false", "no"),
+)
+
+def send_audit_log(order_id: int, user_id: int, total):
+    if not os.getenv("AUDIT_FUNCTION_URL"):
         return
-    try:
-        requests.post(
-            url,
-            json={
-                "order_id": order_id,
-                "user_id": user_id,
-                "total": float(total)},
-                timeout=3
-        )
-    except Exception:
-        pass #Never break checkout if audit fails!
+    # Queued; never blocks or breaks checkout
+    event_writer.audit({
+        "order_id": order_id,
+        "user_id": user_id,
+        "total": float(total)})
 
 def get_secret(name: str) -> str:
-    project_id = os.environ["GOOGLE_CLOUD_PROJECT"]
-    client = secretmanager.SecretManagerServiceClient()
-    secret_path = f"projects/{project_id}/secrets/{name}/versions/latest"
-    return client.access_secret_version(
-        request={"name": secret_path}
-    ).payload.data.decode("utf-8")
+    return secrets.get(name)
 
 def get_translate_key() -> str:
     return get_secret("TRANSLATE_API_KEY").strip()
 
+def _translate_post(*args, **kwargs):
+    with instrumentation.external_call():
+        try:
+            return outbound.post(*args, **kwargs)
+        except CircuitOpenError:
+            raise TranslationError("Translation service unavailable, try again shortly")
+
+translator = TranslationService(
+    lambda: get_translate_key(),
+    _translate_post,
+    cache=LRUTTLCache(
+        max_size=int(os.getenv("TRANSLATION_CACHE_SIZE", "4096")),
+        ttl=float(os.getenv("TRANSLATION_CACHE_TTL", "86400")),
+    ),
+    store=(lambda: mongo_db["translations"]) if os.getenv("TRANSLATION_CACHE_MONGO") else None,
+)
+
+
+role_resolver = RoleResolver(
+    lambda: mysql_engine,
+    use_table=bool(os.getenv("ROLES_FROM_DB")),
+    ttl=float(os.getenv("ROLES_CACHE_TTL", "60")),
+)
+
+def current_role() -> str:
+    # Resolved at login and kept in the session; re-resolved only when the
+    # admin list (or the roles cache window) has changed since
+    if not session.get("email"):
+        return roles.USER
+    version = role_resolver.version()
+    if session.get("role") is None or session.get("role_v") != version:
+        session["role"] = role_resolver.role_for(session["email"])
+        session["role_v"] = version
+    return session["role"]
 
 def is_admin() -> bool:
-    admin_emails = [
-        e.strip().lower()
-        for e in (os.getenv("ADMIN_EMAIL") or "").split(",")
-        if e.strip()
-    ]
-    return (session.get("email") or "").lower() in admin_emails
+    return current_role() == roles.ADMIN
 
 
-if not firebase_admin._apps:
-    firebase_json = get_secret("FIREBASEID")
-    cred = credentials.Certificate(json.loads(firebase_json))
-    firebase_admin.initialize_app(cred)
+_firebase_lock = threading.Lock()
+
+def init_firebase():
+    # Deferred to the first login so cold starts skip the secret fetch and SDK setup
+    if firebase_admin._apps:
+        return
+    with _firebase_lock:
+        if not firebase_admin._apps:
+            with startup.timed("firebase.init"):
+                firebase_json = get_secret("FIREBASEID")
+                cred = credentials.Certificate(json.loads(firebase_json))
+                firebase_admin.initialize_app(cred)
+
+
+# ID tokens are issued for the Firebase project, which is not the App Engine
+# project; without FIREBASE_PROJECT_ID it is read from the FIREBASEID
+# service account on the first login
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+
+def firebase_project_id() -> str:
+    global FIREBASE_PROJECT_ID
+    if not FIREBASE_PROJECT_ID:
+        FIREBASE_PROJECT_ID = json.loads(get_secret("FIREBASEID"))["project_id"]
+    return FIREBASE_PROJECT_ID
+
+signing_keys = SigningKeys(logger=app.logger)
+if os.getenv("FIREBASE_KEYS_PREFETCH"):
+    # Warm the key cache in the background so the first login doesn't pay for it
+    threading.Thread(target=signing_keys.get, name="signing-keys-prefetch", daemon=True).start()
+
+def _verify_id_token(id_token: str) -> dict:
+    # Local RS256 check against cached Google keys; FIREBASE_VERIFY_MODE=sdk
+    # falls back to firebase_admin (which also fetches the certs itself)
+    if os.getenv("FIREBASE_VERIFY_MODE") == "sdk":
+        init_firebase()
+        return fb_auth.verify_id_token(id_token)
+    return verify_firebase_token(id_token, signing_keys.get(), firebase_project_id())
+
+token_verifier = CachedTokenVerifier(
+    _verify_id_token, ttl=float(os.getenv("TOKEN_CACHE_TTL", "60"))
+)
 
 
 # Protecting the endpoints
@@ -98,21 +314,41 @@ def index():
 @app.route("/api/logs")
 @login_required
 def get_logs():
-    logs = list(mongo_db["order_logs"].find({}, {"_id": 0}))
-    return jsonify(logs)
+    # One page per call, newest first; the next page's cursor is in X-Next-Cursor.
+    # Non-admins only ever see their own logs.
+    args = request.args
+    try:
+        order_id = int(args["order_id"]) if args.get("order_id") else None
+        limit = int(args.get("limit") or DEFAULT_LOG_PAGE)
+        filters = {"order_id": order_id, "since": args.get("since"), "until": args.get("until")}
+        if not is_admin():
+            filters["user_id"] = session.get("user_id")
+        elif args.get("user_id"):
+            filters["user_id"] = int(args["user_id"])
+        logs, next_cursor = order_logs.page(limit=limit, cursor=args.get("cursor"), **filters)
+    except (LogQueryError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    response = jsonify(logs)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 @app.route("/api/menu", methods=["GET"])
 def get_menu():
     try:
-        conn = mysql_engine.connect()
-        result = conn.execute(text("SELECT id, name, price FROM menu"))
-        menu_items = [dict(r._mapping) for r in result]
-        conn.close()
+        snap = menu_cache.get(mysql_engine)
 
-        return jsonify({
-            "success": True,
-            "menu": menu_items
-        })
+        # Weak match: compressed responses carry W/"<etag>"
+        if request.if_none_match.contains_weak(snap.etag):
+            resp = app.response_class(status=304)
+        else:
+            resp = app.response_class(snap.body, mimetype="application/json")
+
+        # Clients may keep a copy but must revalidate (cheap 304) each time
+        resp.set_etag(snap.etag)
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
 
     except Exception as e:
         return jsonify({
@@ -123,9 +359,7 @@ def get_menu():
 @app.route("/api/menu", methods=["POST"])
 @login_required
 def add_menu_item():
-    # Admin check (comma-separated allowed emails)
-    admin_emails = [e.strip().lower() for e in (os.getenv("ADMIN_EMAIL") or "").split(",") if e.strip()]
-    if (session.get("email") or "").lower() not in admin_emails:
+    if not is_admin():
         return jsonify({"success": False, "error": "Admin only"}), 403
 
     data = request.get_json(silent=True) or {}
@@ -149,6 +383,8 @@ def add_menu_item():
         )
         new_id = result.lastrowid
 
+    menu_cache.invalidate()
+
     return jsonify({"success": True, "id": new_id, "name": name, "price": price})
 
 
@@ -156,6 +392,7 @@ def add_menu_item():
 
 @app.route("/api/order", methods=["POST"])
 @login_required
+@admission_control.limit("checkout")
 def create_order():
     try:
         data = request.get_json()
@@ -168,70 +405,138 @@ def create_order():
         if not items:
             return jsonify({"success": False, "error": "Invalid request data"}), 400
 
-        # commits automatically on success
-        with mysql_engine.begin() as conn:
-            result = conn.execute(
-                text("""
-                    INSERT INTO orders (user_id, total, status)
-                    VALUES (:user_id, 0, 'pending')
-                """),
-                {"user_id": user_id}
-            )
-            order_id = result.lastrowid
+        # Same skip rules as before: bad lines and unknown menu ids are ignored
+        lines = []
+        for item in items:
+            menu_id = item.get("menu_id")
+            quantity = item.get("quantity")
+
+            if not menu_id or not quantity or quantity <= 0:
+                continue
+
+            lines.append((menu_id, quantity))
+
+        idem_key = (request.headers.get("Idempotency-Key") or "").strip()
+        if not idem_key:
+            return jsonify(_place_order(user_id, items, lines))
+
+        if len(idem_key) > MAX_KEY_LENGTH:
+            return jsonify({"success": False, "error": "Idempotency-Key is too long"}), 400
+
+        req_hash = request_hash(items)
+        # Duplicates on this worker queue here; the first one does the work
+        with idempotency_store.local_lock(user_id, idem_key):
+            stored = idempotency_store.cached(user_id, idem_key)
+            if stored is None:
+                try:
+                    return jsonify(_place_order(user_id, items, lines, (idem_key, req_hash)))
+                except KeyAlreadyUsed:
+                    # Another worker finished (or is committing) the same checkout
+                    stored = idempotency_store.lookup(user_id, idem_key)
+                    if stored is None:
+                        return jsonify({"success": False, "error": "Request with this Idempotency-Key is still in progress"}), 409
+
+        status_code, body, stored_hash = stored
+        if stored_hash != req_hash:
+            return jsonify({"success": False, "error": "Idempotency-Key was already used for a different order"}), 422
+
+        resp = app.response_class(body, status=status_code, mimetype="application/json")
+        resp.headers["Idempotent-Replayed"] = "true"
+        return resp
 
-            total_price = 0.0
-
-            for item in items:
-                menu_id = item.get("menu_id")
-                quantity = item.get("quantity")
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
 
-                if not menu_id or not quantity or quantity <= 0:
-                    continue
+def _place_order(user_id, items, lines, idem=None) -> dict:
+    # Prices come from the in-memory menu; anything it doesn't know yet
+    # (e.g. added on another worker) falls back to one IN lookup below
+    menu = menu_cache.get(mysql_engine)
+    prices, names = menu.prices, menu.names
 
-                price_row = conn.execute(
-                    text("SELECT price FROM menu WHERE id = :menu_id"),
-                    {"menu_id": menu_id}
-                ).fetchone()
+    # commits automatically on success
+    with mysql_engine.begin() as conn:
+        if idem:
+            # Claimed first so a concurrent duplicate blocks on this row
+            idempotency_store.claim(conn, user_id, *idem)
+
+        missing = list({menu_id for menu_id, _ in lines if str(menu_id) not in prices})
+        if missing:
+            price_rows = conn.execute(
+                text("SELECT id, name, price FROM menu WHERE id IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": missing}
+            ).fetchall()
+            prices = dict(prices, **{str(r[0]): float(r[2]) for r in price_rows})
+            names = dict(names, **{str(r[0]): r[1] for r in price_rows})
 
-                if not price_row:
-                    continue
+        order_lines = []
+        total_price = 0.0
+        for menu_id, quantity in lines:
+            price = prices.get(str(menu_id))
+            if price is None:
+                continue
 
-                price = float(price_row[0])
-                total_price += price * quantity
+            total_price += price * quantity
+            order_lines.append({"menu_id": menu_id, "quantity": quantity, "price": price,
+                                "name": names[str(menu_id)], "line_total": round(price * quantity, 2)})
 
-                conn.execute(
-                    text("""
-                        INSERT INTO order_items (order_id, menu_id, quantity)
-                        VALUES (:order_id, :menu_id, :quantity)
-                    """),
-                    {
-                        "order_id": order_id,
-                        "menu_id": menu_id,
-                        "quantity": quantity
-                    }
-                )
+        # Total is known up front, so no follow-up UPDATE is needed
+        result = conn.execute(
+            text("""
+                INSERT INTO orders (user_id, total, status)
+                VALUES (:user_id, :total, 'pending')
+            """),
+            {"user_id": user_id, "total": total_price}
+        )
+        order_id = result.lastrowid
 
+        if order_lines:
+            # executemany -> a single multi-row INSERT with pymysql. Name and
+            # price are stored as sold, so reads never need the menu
             conn.execute(
-                text("UPDATE orders SET total = :total WHERE id = :order_id"),
-                {"total": total_price, "order_id": order_id}
+                text("""
+                    INSERT INTO order_items (order_id, menu_id, quantity, item_name, unit_price, line_total)
+                    VALUES (:order_id, :menu_id, :quantity, :name, :price, :line_total)
+                """),
+                [dict(line, order_id=order_id) for line in order_lines]
             )
 
-        mongo_db["order_logs"].insert_one({
-            "order_id": order_id,
-            "user_id": user_id,
-            "items": items,
-            "message": "Order created"
-        })
+        response = {"success": True, "order_id": order_id}
+        if idem:
+            body = app.json.dumps(response)
+            idempotency_store.complete(conn, user_id, idem[0], 200, body)
 
-        try:
-            send_audit_log(order_id, user_id, total_price)
-        except Exception as audit_err:
-            app.logger.exception("Audit log call failed: %s", audit_err)
-        
-        return jsonify({"success": True, "order_id": order_id})
+    if idem:
+        idempotency_store.remember(user_id, idem[0], (200, body, idem[1]))
+        idempotency_store.maybe_purge()
 
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    _wrote()
+
+    sales_rollups.order_created(total_price, order_lines)
+
+    event_writer.log({
+        "order_id": order_id,
+        "user_id": user_id,
+        "items": items,
+        "message": "Order created"
+    })
+
+    order_broadcaster.publish(order_events.ORDER_CREATED, {
+        "id": order_id,
+        "user_id": user_id,
+        "email": session.get("email"),
+        "total": total_price,
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+    try:
+        send_audit_log(order_id, user_id, total_price)
+    except Exception as audit_err:
+        app.logger.exception("Audit log call failed: %s", audit_err)
+
+    return response
 
 @app.route("/api/orders", methods=["GET"])
 @login_required
@@ -241,19 +546,84 @@ def list_my_orders():
         if not user_id:
             return jsonify({"success": False, "error": "Not logged in"}), 401
 
-        with mysql_engine.connect() as conn:
+        page = parse_page_args(request.args)
+        conditions, params = order_page_filters(page)
+
+        with read_connection() as conn:
             rows = conn.execute(
-                text("""
+                text(f"""
                 SELECT id, total, status, created_at
                 FROM orders
-                WHERE user_id = :user_id
-                ORDER BY created_at DESC                
+                WHERE {" AND ".join(["user_id = :user_id"] + conditions)}
+                {order_page_suffix(page)}
                 """),
-                {"user_id": user_id}
+                dict(params, user_id=user_id)
             ).fetchall()
         
-        orders = [dict(r._mapping) for r in rows]
-        return jsonify({"success": True, "orders": orders})
+        orders, next_cursor = split_page([dict(r._mapping) for r in rows], page)
+        return jsonify({"success": True, "orders": orders, "next_cursor": next_cursor})
+
+    except PageArgsError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def _order_history(user_id, page):
+    # Orders with their items and logs in three queries total, whatever the
+    # count; shared by /api/orders/history and the /orders page
+    conditions, params = order_page_filters(page)
+
+    with read_connection() as conn:
+        rows = conn.execute(
+            text(f"""
+            SELECT id, total, status, created_at
+            FROM orders
+            WHERE {" AND ".join(["user_id = :user_id"] + conditions)}
+            {order_page_suffix(page)}
+            """),
+            dict(params, user_id=user_id)
+        ).fetchall()
+
+        orders, next_cursor = split_page([dict(r._mapping) for r in rows], page)
+        order_ids = [o["id"] for o in orders]
+
+        item_rows = []
+        if order_ids:
+            item_rows = conn.execute(
+                text(f"""
+                    SELECT order_id, {ITEM_COLUMNS}
+                    FROM order_items
+                    WHERE order_id IN :order_ids
+                """).bindparams(bindparam("order_ids", expanding=True)),
+                {"order_ids": order_ids}
+            ).fetchall()
+
+    items_by_order = {}
+    for r in item_rows:
+        item = dict(r._mapping)
+        items_by_order.setdefault(item.pop("order_id"), []).append(item)
+
+    logs_by_order = order_logs.for_orders(order_ids)
+
+    for o in orders:
+        o["items"] = items_by_order.get(o["id"], [])
+        o["logs"] = logs_by_order.get(o["id"], [])
+
+    return {"success": True, "orders": orders, "next_cursor": next_cursor}
+
+@app.route("/api/orders/history", methods=["GET"])
+@login_required
+def order_history():
+    try:
+        user_id = session.get("user_id")
+        if not user_id:
+            return jsonify({"success": False, "error": "Not logged in"}), 401
+
+        return jsonify(_order_history(user_id, parse_page_args(request.args)))
+
+    except PageArgsError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -262,57 +632,62 @@ def list_my_orders():
 @login_required
 def get_order(order_id: int):
     try:
-        conn = mysql_engine.connect()
+        cached = completed_orders.get(order_id)
+        if cached is not None:
+            order, items = cached
+        else:
+            with read_connection() as conn:
+                order_row = conn.execute(
+                    text("""
+                        SELECT id, user_id, total, status, created_at
+                        FROM orders
+                        WHERE id = :order_id
+                    """),
+                    {"order_id": order_id}
+                ).fetchone()
 
-        order_row = conn.execute(
-            text("""
-                SELECT id, user_id, total, status, created_at
-                FROM orders
-                WHERE id = :order_id
-            """),
-            {"order_id": order_id}
-        ).fetchone()
+                if not order_row:
+                    return jsonify({
+                        "success": False,
+                        "error": "Order not found"
+                    }), 404
 
-        if not order_row:
-            conn.close()
-            return jsonify({
-                "success": False,
-                "error": "Order not found"
-            }), 404
+                order = dict(order_row._mapping)
+
+                items_result = conn.execute(
+                    text(f"""
+                        SELECT {ITEM_COLUMNS}
+                        FROM order_items
+                        WHERE order_id = :order_id
+                    """),
+                    {"order_id": order_id}
+                )
+
+                items = [dict(r._mapping) for r in items_result]
+
+            if order["status"] == "completed":
+                completed_orders.set(order_id, (order, items))
 
-        if order_row._mapping["user_id"] != session.get("user_id"):
-            conn.close()
+        if order["user_id"] != session.get("user_id"):
             return jsonify({
                 "success": False,
                 "error": "Unauthorized"
             }), 403
 
-        order = dict(order_row._mapping)
+        logs = order_logs.for_order(order_id)
 
-        items_result = conn.execute(
-            text("""
-                SELECT oi.menu_id, m.name, m.price, oi.quantity,
-                       (m.price * oi.quantity) AS line_total
-                FROM order_items oi
-                JOIN menu m ON m.id = oi.menu_id
-                WHERE oi.order_id = :order_id
-            """),
-            {"order_id": order_id}
-        )
-
-        items = [dict(r._mapping) for r in items_result]
-        conn.close()
-
-        logs = list(
-            mongo_db["order_logs"].find({"order_id": order_id}, {"_id": 0})
-        )
-
-        return jsonify({
+        resp = jsonify({
             "success": True,
             "order": order,
             "items": items,
             "logs": logs
         })
+        if order["status"] == "completed":
+            # Completed orders no longer change, so repeat views can be a 304
+            resp.add_etag()
+            resp.headers["Cache-Control"] = "private, no-cache"
+            resp.make_conditional(request)
+        return resp
 
     except Exception as e:
         return jsonify({
@@ -329,40 +704,109 @@ def update_order_status(order_id: int):
     data = request.get_json(silent=True) or {}
     new_status = (data.get("status") or "").strip().lower()
 
-    allowed = {"pending", "confirmed", "completed"}
-    if new_status not in allowed:
-        return jsonify({"success": False, "error": f"Invalid status. Allowed: {sorted(allowed)}"}), 400
+    try:
+        order_status.allowed_from(new_status)
+    except order_status.InvalidTransition as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
     with mysql_engine.begin() as conn:
-        row = conn.execute(
-            text("SELECT id, status FROM orders WHERE id = :id"),
-            {"id": order_id}
-        ).fetchone()
+        moved, outcomes = order_status.transition(conn, [order_id], new_status)
 
-        if not row:
-            return jsonify({"success": False, "error": "Order not found"}), 404
+    outcome, current = outcomes[order_id]
+    if outcome == order_status.NOT_FOUND:
+        return jsonify({"success": False, "error": "Order not found"}), 404
+    if outcome == order_status.CONFLICT:
+        return jsonify({
+            "success": False,
+            "error": f"Order is {current}; it can only become {new_status} from "
+                     f"{' or '.join(order_status.TRANSITIONS[new_status])}",
+            "status": current
+        }), 409
 
-        conn.execute(
-            text("UPDATE orders SET status = :status WHERE id = :id"),
-            {"status": new_status, "id": order_id}
-        )
+    if moved:
+        _wrote()
+        _status_changed(moved, new_status)
 
-    # Optional: log status change in Mongo for audit trail
-        mongo_db["order_logs"].insert_one({
-        "order_id": order_id,
-        "user_id": session.get("user_id"),
-        "message": f"Admin set status to {new_status}",
-        "status": new_status
+    return jsonify({"success": True, "order_id": order_id, "status": new_status})
+
+@app.route("/api/admin/orders/status", methods=["POST"])
+@login_required
+def bulk_update_order_status():
+    # Kitchen view: confirm or complete many orders at once
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    data = request.get_json(silent=True) or {}
+    new_status = (data.get("status") or "").strip().lower()
+    try:
+        order_status.allowed_from(new_status)
+    except order_status.InvalidTransition as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    order_ids = data.get("order_ids")
+    if (not isinstance(order_ids, list) or not order_ids
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in order_ids)):
+        return jsonify({"success": False, "error": "order_ids must be a non-empty list of integers"}), 400
+    if len(order_ids) > order_status.MAX_BULK_ORDERS:
+        return jsonify({"success": False, "error": f"At most {order_status.MAX_BULK_ORDERS} orders per request"}), 400
+
+    with mysql_engine.begin() as conn:
+        moved, outcomes = order_status.transition(conn, order_ids, new_status)
+
+    updated = [i for i, (outcome, _) in outcomes.items() if outcome == order_status.UPDATED]
+    if moved:
+        _wrote()
+        # Orders that were already in new_status aren't logged or published again
+        _status_changed(moved, new_status)
+
+    return jsonify({
+        "success": True,
+        "status": new_status,
+        "updated": updated,
+        "conflicts": [{"id": i, "status": current} for i, (outcome, current) in outcomes.items()
+                      if outcome == order_status.CONFLICT],
+        "not_found": [i for i, (outcome, _) in outcomes.items() if outcome == order_status.NOT_FOUND],
     })
 
-    return jsonify({"success": True, "order_id": order_id, "status": new_status})
+def _status_changed(order_ids, new_status):
+    # Single source per target (see order_status.TRANSITIONS)
+    sales_rollups.status_changed(order_status.TRANSITIONS[new_status][0], new_status, len(order_ids))
+
+    for order_id in order_ids:
+        # Optional: log status change in Mongo for audit trail
+        event_writer.log({
+            "order_id": order_id,
+            "user_id": session.get("user_id"),
+            "message": f"Admin set status to {new_status}",
+            "status": new_status
+        })
+        order_broadcaster.publish(order_events.ORDER_STATUS_CHANGED, {"id": order_id, "status": new_status})
 
 @app.route("/admin/orders")
 @page_login_required
 def admin_orders_page():
     if not is_admin():
         return redirect("/")
-    return render_template("admin_orders.html")
+    # Resuming the live stream from here covers orders placed after this query
+    last_event_id = order_broadcaster.last_event_id()
+    return render_template("admin_orders.html", initial=_embedded(lambda: _admin_orders(parse_page_args({}))),
+                           last_event_id=last_event_id)
+
+def _admin_orders(page):
+    # Shared by /api/admin/orders and the /admin/orders page
+    conditions, params = order_page_filters(page, alias="o")
+
+    with read_connection() as conn:
+        rows = conn.execute(text(f"""
+            SELECT o.id, o.user_id, u.email, o.total, o.status, o.created_at
+            FROM orders o
+            JOIN users u ON u.id = o.user_id
+            WHERE {" AND ".join(["o.hidden_from_admin = 0"] + conditions)}
+            {order_page_suffix(page, alias="o")}
+        """), params).fetchall()
+
+    orders, next_cursor = split_page([dict(r._mapping) for r in rows], page)
+    return {"success": True, "orders": orders, "next_cursor": next_cursor}
 
 @app.route("/api/admin/orders", methods=["GET"])
 @login_required
@@ -370,17 +814,132 @@ def admin_list_orders():
     if not is_admin():
         return jsonify({"success": False, "error": "Admin only"}), 403
 
-    with mysql_engine.connect() as conn:
-        rows = conn.execute(text("""
-            SELECT o.id, o.user_id, u.email, o.total, o.status, o.created_at
-            FROM orders o
-            JOIN users u ON u.id = o.user_id
-            WHERE o.hidden_from_admin = 0
-            ORDER BY o.created_at DESC
-        """)).fetchall()
+    try:
+        page = parse_page_args(request.args)
+    except PageArgsError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
 
-    orders = [dict(r._mapping) for r in rows]
-    return jsonify({"success": True, "orders": orders})
+    return jsonify(_admin_orders(page))
+
+@app.route("/api/admin/orders/export", methods=["GET"])
+@login_required
+def admin_export_orders():
+    # Orders x items for reporting, written out batch by batch from a
+    # server-side cursor; since/until/status filter like the listing endpoint
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    fmt = (request.args.get("format") or "ndjson").lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "error": f"format must be one of {sorted(EXPORT_FORMATS)}"}), 400
+    try:
+        page = parse_page_args(request.args)
+    except PageArgsError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    batches = export_batches(db_router.reader(), page, batch_size=EXPORT_BATCH_SIZE)
+    chunks = csv_chunks(batches) if fmt == "csv" else ndjson_chunks(batches, app.json.dumps)
+    return app.response_class(
+        stream_with_context(chunks),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=orders.{fmt}"},
+    )
+
+# Each open stream holds a worker thread for up to ORDER_STREAM_MAX_SECONDS, so
+# it is only on when the worker serves other requests at the same time
+# (gunicorn.conf.py's gthread default); under a sync worker one admin board
+# would stop the whole app
+ORDER_STREAM_ENABLED = os.getenv("ORDER_STREAM_ENABLED", str(db.WORKER_THREADS > 1)).lower() \
+    not in ("0", "false", "no")
+
+@app.route("/api/admin/orders/stream", methods=["GET"])
+@login_required
+def admin_order_stream():
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+    if not ORDER_STREAM_ENABLED:
+        # EventSource doesn't reconnect after a non-200 response
+        return jsonify({"success": False, "error": "Live updates are disabled"}), 503
+
+    # EventSource sends Last-Event-ID on reconnect; ?last_event_id= for manual resume
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    sub = order_broadcaster.subscribe(last_id)
+    max_seconds = float(os.getenv("ORDER_STREAM_MAX_SECONDS", "300"))
+
+    def generate():
+        yield "retry: 3000\n\n"
+        # Streams end periodically so a thread is not held forever; the
+        # browser reconnects and resumes from the last id it saw
+        for event in sub.events(heartbeat=15, max_seconds=max_seconds):
+            yield format_sse(event, app.json.dumps)
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/api/admin/logs/export", methods=["GET"])
+@login_required
+def admin_export_logs():
+    # Whole (filtered) log as NDJSON, streamed so memory stays flat
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    args = request.args
+    try:
+        filters = {
+            "order_id": int(args["order_id"]) if args.get("order_id") else None,
+            "user_id": int(args["user_id"]) if args.get("user_id") else None,
+            "since": args.get("since"),
+            "until": args.get("until"),
+        }
+        docs = order_logs.stream(**filters)
+    except (LogQueryError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    def generate():
+        for doc in docs:
+            yield app.json.dumps(doc) + "\n"
+
+    return app.response_class(
+        stream_with_context(generate()),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=order_logs.ndjson"},
+    )
+
+@app.route("/api/admin/analytics", methods=["GET"])
+@login_required
+def admin_analytics():
+    # Served from the sales_* rollup tables, never from orders/order_items
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    try:
+        days = int(request.args.get("days") or 30)
+        top = int(request.args.get("top") or 10)
+    except ValueError:
+        return jsonify({"success": False, "error": "days and top must be integers"}), 400
+
+    with db_router.connect() as conn:
+        data = analytics.summary(conn, days=days, top=top)
+    return jsonify(dict(data, success=True))
+
+@app.route("/api/admin/pool-stats", methods=["GET"])
+@login_required
+def admin_pool_stats():
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    return jsonify({"success": True, "pools": db.pool_stats(), "routing": db_router.stats()})
+
+@app.route("/api/admin/event-stats", methods=["GET"])
+@login_required
+def admin_event_stats():
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    return jsonify({"success": True, "events": event_writer.stats(), "order_stream": order_broadcaster.stats()})
 
 @app.route("/api/order/<int:order_id>/hide", methods=["PATCH"])
 @login_required
@@ -389,36 +948,32 @@ def hide_order_from_admin(order_id: int):
         return jsonify({"success": False, "error": "Admin only"}), 403
 
     with mysql_engine.begin() as conn:
-        row = conn.execute(
-            text("SELECT status, hidden_from_admin FROM orders WHERE id = :id"),
-            {"id": order_id}
-        ).fetchone()
-
-        if not row:
-            return jsonify({"success": False, "error": "Order not found"}), 404
+        outcome = order_status.hide(conn, order_id)
 
-        status = (row._mapping["status"] or "").lower()
-        if status != "completed":
-            return jsonify({"success": False, "error": "Only completed orders can be deleted from admin view"}), 400
-
-        conn.execute(
-            text("UPDATE orders SET hidden_from_admin = 1 WHERE id = :id"),
-            {"id": order_id}
-        )
+    if outcome == order_status.NOT_FOUND:
+        return jsonify({"success": False, "error": "Order not found"}), 404
+    if outcome == order_status.CONFLICT:
+        return jsonify({"success": False, "error": "Only completed orders can be deleted from admin view"}), 400
+    if outcome is None:
+        return jsonify({"success": True, "order_id": order_id})  # already hidden
+    _wrote()
 
     # optional audit trail in Mongo
-    mongo_db["order_logs"].insert_one({
+    event_writer.log({
         "order_id": order_id,
         "user_id": session.get("user_id"),
         "message": "Admin hid order from admin view",
         "action": "hide_from_admin"
     })
 
+    order_broadcaster.publish(order_events.ORDER_HIDDEN, {"id": order_id})
+
     return jsonify({"success": True, "order_id": order_id})
 
 
 @app.route("/api/translate", methods=["POST"])
 @login_required
+@admission_control.limit("translate")
 def translate_text():
     data = request.get_json(silent=True) or {}
     text_in = data.get("text", "")
@@ -430,18 +985,38 @@ def translate_text():
             "error": "No text to translate"
         }), 400
 
-    Translation_Key = get_translate_key()
+    try:
+        translated = translator.translate(text_in, target)
+    except TranslationError as e:
+        return jsonify({"success": False, "error": str(e)}), 502
 
-    url = f"https://translation.googleapis.com/language/translate/v2?key={Translation_Key}"
-    payload = {"q": text_in, "target": target}
+    return jsonify({"success": True, "translated": translated, "target": target})
 
-    r = requests.post(url, json=payload, timeout=10)
-    if r.status_code != 200:
-        return jsonify({"success": False, "error": r.text}), 502
+MAX_BATCH_TEXTS = 500
 
-    out = r.json()
-    translated = out["data"]["translations"][0]["translatedText"]
-    return jsonify({"success": True, "translated": translated, "target": target})
+@app.route("/api/translate/batch", methods=["POST"])
+@login_required
+@admission_control.limit("translate")
+def translate_batch():
+    data = request.get_json(silent=True) or {}
+    texts = data.get("texts")
+    target = data.get("target", "es")
+
+    if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify({
+            "success": False,
+            "error": "texts must be a non-empty list of non-empty strings"
+        }), 400
+
+    if len(texts) > MAX_BATCH_TEXTS:
+        return jsonify({"success": False, "error": f"At most {MAX_BATCH_TEXTS} texts per batch"}), 400
+
+    try:
+        translated = translator.translate_many(texts, target)
+    except TranslationError as e:
+        return jsonify({"success": False, "error": str(e)}), 502
+
+    return jsonify({"success": True, "translations": translated, "target": target})
 
 @app.route("/login")
 def login_page():
@@ -459,7 +1034,7 @@ def session_login():
                 "error": "Missing idToken"
             }), 400
 
-        decoded = fb_auth.verify_id_token(id_token)
+        decoded = token_verifier.verify(id_token)
 
         email = decoded.get("email")
         name = decoded.get("name")
@@ -471,17 +1046,13 @@ def session_login():
 
 
         with mysql_engine.begin() as conn:
-            row = conn.execute(text("SELECT id FROM users WHERE email = :email"), {"email": email}).fetchone()
-
-            if row:
-                user_id = row[0]
-            else:
-                result = conn.execute(text("INSERT INTO users (email, name) VALUES (:email, :name)"), {"email": email, "name": name})
-                user_id = result.lastrowid
+            user_id = upsert_user(conn, email, name)
 
         session["uid"] = decoded["uid"]
         session["email"] = email
         session["user_id"] = user_id
+        session["role"] = role_resolver.role_for(email)
+        session["role_v"] = role_resolver.version()
         return jsonify({"success": True})
 
     except Exception as e:
@@ -492,15 +1063,27 @@ def logout():
     session.clear()
     return redirect("/")
 
+def _embedded(query):
+    # Initial data rendered into the page, in the same JSON shape the API
+    # returns, so the browser can draw without a second round trip. None
+    # (e.g. the database is down) makes the page fetch it itself instead.
+    try:
+        return query()
+    except Exception as e:
+        app.logger.warning("Embedding page data failed, client will fetch: %s", e)
+        return None
+
 @app.route("/menu")
 @page_login_required
 def menu_page():
-    return render_template("menu.html", is_admin=is_admin())
+    return render_template("menu.html", is_admin=is_admin(), initial=_embedded(
+        lambda: {"success": True, "menu": menu_cache.get(mysql_engine).items}))
 
 @app.route("/orders")
 @page_login_required
 def orders_page():
-    return render_template("orders.html")
+    return render_template("orders.html", initial=_embedded(
+        lambda: _order_history(session.get("user_id"), parse_page_args({}))))
 
 @app.route("/translate")
 @page_login_required
@@ -511,17 +1094,12 @@ def translate_page():
 @app.route("/test-mongo")
 def test_mongo():
     try:
-        logs_cursor = mongo_db["order_logs"].find({})
-        logs = []
-
-        for log in logs_cursor:
-            log["_id"] = str(log["_id"])  # make JSON serialisable
-            logs.append(log)
+        logs, _ = order_logs.page(limit=20)
 
         return {
             "connected": True,
             "collections": mongo_db.list_collection_names(),
-            "count": len(logs),
+            "count": order_logs.collection().estimated_document_count(),
             "logs": logs
         }
 
@@ -543,5 +1121,32 @@ def debug_admin():
         "ADMIN_EMAIL": os.getenv("ADMIN_EMAIL")
     }
 
+@app.route("/api/admin/metrics", methods=["GET"])
+@login_required
+def admin_metrics():
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    return jsonify({
+        "success": True,
+        "routes": instrumentation.route_snapshot(),
+        "response_bytes": http_cache.bytes_snapshot(),
+        "outbound": outbound.stats(),
+        "admission": admission_control.stats(),
+        "auth": dict(token_verifier.stats(), key_refreshes=signing_keys.refreshes,
+                     key_refresh_failures=signing_keys.refresh_failures),
+    })
+
+@app.route("/api/admin/startup-timings", methods=["GET"])
+@login_required
+def admin_startup_timings():
+    if not is_admin():
+        return jsonify({"success": False, "error": "Admin only"}), 403
+
+    return jsonify({"success": True, "timings_ms": startup.report()})
+
+startup.record("main.import", time.perf_counter() - _import_started)
+app.logger.info("startup timings %s", json.dumps(startup.report()))
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+
+# One immutable view of the menu; swapped out whole on reload
+MenuSnapshot = namedtuple("MenuSnapshot", "version items prices names body etag loaded_at")
+
+
+class MenuCache:
+    # The menu only changes through POST /api/menu, so each worker keeps it in
+    # memory. A local write invalidates immediately; other gunicorn workers pick
+    # the change up once their copy is older than `ttl` seconds.
+    def __init__(self, dumps, ttl: float = 30.0):
+        self._dumps = dumps
+        self.ttl = ttl
+        self._version = 0
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self, engine) -> MenuSnapshot:
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - snap.loaded_at < self.ttl:
+            return snap
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            snap = self._snapshot
+            if snap is not None and time.monotonic() - snap.loaded_at < self.ttl:
+                return snap
+            snap = self._load(engine)
+            self._snapshot = snap
+            return snap
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _load(self, engine) -> MenuSnapshot:
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT id, name, price FROM menu")).fetchall()
+
+        items = [dict(r._mapping) for r in rows]
+        prices = {str(item["id"]): float(item["price"]) for item in items}
+        names = {str(item["id"]): item["name"] for item in items}
+
+        # Same body jsonify() would produce, serialised once per reload
+        body = (self._dumps({"success": True, "menu": items}) + "\n").encode("utf-8")
+        # Content hash so every worker hands out the same ETag for the same menu
+        etag = hashlib.sha1(body).hexdigest()[:20]
+
+        return MenuSnapshot(self._version, items, prices, names, body, etag, time.monotonic())
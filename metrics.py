@@ -0,0 +1,64 @@
+import bisect
+import threading
+
+# Upper bounds in milliseconds; anything slower lands in the "+Inf" bucket
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histogram:
+    # Small thread-safe latency histogram, reported as plain JSON
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS, unit: str = "ms"):
+        self.buckets_ms = tuple(buckets_ms)
+        self.unit = unit
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        self.observe_value(seconds * 1000.0)
+
+    def observe_value(self, ms: float):
+        # Raw value in the histogram's own unit (ms, or e.g. a query count)
+        idx = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum_ms += ms
+            if ms > self._max_ms:
+                self._max_ms = ms
+
+    def percentile(self, pct: float):
+        # Upper bound of the bucket holding the pct-th observation
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            max_ms = self._max_ms
+        if not total:
+            return None
+        rank = pct / 100.0 * total
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets_ms[i] if i < len(self.buckets_ms) else max_ms
+        return max_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            sum_ms = self._sum_ms
+            max_ms = self._max_ms
+        labels = [f"le_{b}{self.unit}" for b in self.buckets_ms] + ["+Inf"]
+        return {
+            "count": total,
+            "sum_ms": round(sum_ms, 3),
+            "avg_ms": round(sum_ms / total, 3) if total else None,
+            "max_ms": round(max_ms, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": dict(zip(labels, counts)),
+        }
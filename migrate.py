@@ -0,0 +1,56 @@
+import os
+import sys
+
+from sqlalchemy import text
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def _statements(sql: str):
+    # Files are plain SQL; statements end with ";" and "--" lines are comments
+    lines = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    for stmt in "\n".join(lines).split(";"):
+        if stmt.strip():
+            yield stmt.strip()
+
+
+def pending_migrations(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    applied = {r[0] for r in conn.execute(text("SELECT version FROM schema_migrations"))}
+    files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql"))
+    return [f for f in files if f[:-4] not in applied]
+
+
+def apply_migrations(engine, log=print):
+    applied = []
+    with engine.begin() as conn:
+        todo = pending_migrations(conn)
+
+    # One transaction per file (MySQL DDL auto-commits anyway)
+    for filename in todo:
+        with open(os.path.join(MIGRATIONS_DIR, filename), encoding="utf-8") as f:
+            sql = f.read()
+        with engine.begin() as conn:
+            for stmt in _statements(sql):
+                conn.execute(text(stmt))
+            conn.execute(
+                text("INSERT INTO schema_migrations (version) VALUES (:version)"),
+                {"version": filename[:-4]}
+            )
+        log(f"applied {filename}")
+        applied.append(filename)
+    return applied
+
+
+if __name__ == "__main__":
+    from db import mysql_engine
+
+    done = apply_migrations(mysql_engine)
+    if not done:
+        print("nothing to apply")
+    sys.exit(0)
@@ -0,0 +1,6 @@
+-- Keyset pagination on (created_at, id) for /api/orders and /api/admin/orders.
+-- InnoDB appends the primary key (id) to every secondary index, so these cover
+-- ORDER BY created_at DESC, id DESC without an explicit id column.
+CREATE INDEX idx_orders_user_created ON orders (user_id, created_at);
+
+CREATE INDEX idx_orders_hidden_created ON orders (hidden_from_admin, created_at);
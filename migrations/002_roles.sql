@@ -0,0 +1,6 @@
+-- Optional per-user roles, consulted when ROLES_FROM_DB is set.
+-- ADMIN_EMAIL remains the bootstrap list of admins.
+CREATE TABLE roles (
+    email VARCHAR(255) NOT NULL PRIMARY KEY,
+    role VARCHAR(32) NOT NULL
+);
@@ -0,0 +1,12 @@
+-- Stored checkout responses for POST /api/order retries (Idempotency-Key header).
+-- The row is inserted and completed in the same transaction as the order, so a
+-- concurrent duplicate blocks on the key until the first request commits.
+CREATE TABLE idempotency_keys (
+    user_id INTEGER NOT NULL,
+    idem_key VARCHAR(128) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, idem_key)
+);
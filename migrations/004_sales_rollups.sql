@@ -0,0 +1,22 @@
+-- Running totals for /api/admin/analytics. Checkout and status changes add
+-- deltas in memory (analytics.RollupWriter); each worker upserts them every
+-- ANALYTICS_FLUSH_INTERVAL seconds and at shutdown, NOT in the order's
+-- transaction. So the rollups trail orders by up to that interval, and a
+-- worker killed before flushing loses its deltas. `python -m analytics
+-- backfill` rebuilds them from orders/order_items.
+CREATE TABLE sales_daily (
+    day DATE NOT NULL PRIMARY KEY,
+    orders INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE sales_status (
+    status VARCHAR(32) NOT NULL PRIMARY KEY,
+    orders INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE sales_items (
+    menu_id INTEGER NOT NULL PRIMARY KEY,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
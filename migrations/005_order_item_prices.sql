@@ -0,0 +1,12 @@
+-- Name and price of each order line as sold, written by checkout, so order
+-- reads no longer join menu and past orders don't change with the menu.
+-- Rows from before this migration stay NULL until
+-- `python -m order_items backfill` copies in the current menu values.
+ALTER TABLE order_items ADD COLUMN item_name VARCHAR(255);
+
+ALTER TABLE order_items ADD COLUMN unit_price DECIMAL(10, 2);
+
+ALTER TABLE order_items ADD COLUMN line_total DECIMAL(10, 2);
+
+-- Order detail/history read only order_items, by order_id
+CREATE INDEX idx_order_items_order ON order_items (order_id);
@@ -0,0 +1,7 @@
+-- Login upserts users by email (roles.upsert_user: INSERT ... ON DUPLICATE
+-- KEY UPDATE), which only finds the existing row through a unique key on
+-- email; without it every login would insert a new user and user_id.
+-- If this fails on existing duplicates, list them with
+--   SELECT email, COUNT(*) FROM users GROUP BY email HAVING COUNT(*) > 1;
+-- and merge them (moving their orders) before re-running.
+CREATE UNIQUE INDEX uq_users_email ON users (email);
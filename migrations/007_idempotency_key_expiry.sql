@@ -0,0 +1,4 @@
+-- idempotency_keys rows are kept for IDEMPOTENCY_RETENTION_HOURS (24) and
+-- then deleted by each worker's hourly purge (or `python -m idempotency
+-- purge`); this index keeps that DELETE from scanning the whole table.
+CREATE INDEX idx_idempotency_keys_created ON idempotency_keys (created_at);
@@ -0,0 +1,244 @@
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+# Order lifecycle event types pushed to the admin board
+ORDER_CREATED = "order_created"
+ORDER_STATUS_CHANGED = "order_status_changed"
+ORDER_HIDDEN = "order_hidden"
+
+
+class Subscription:
+    def __init__(self, broadcaster, max_queue: int):
+        self._broadcaster = broadcaster
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def events(self, heartbeat: float = 15.0, max_seconds: float = None):
+        # Yields events as they arrive, or None every `heartbeat` seconds so the
+        # caller can send a keep-alive. Ends after max_seconds or on overflow.
+        deadline = time.monotonic() + max_seconds if max_seconds else None
+        try:
+            while not self.overflowed:
+                wait = heartbeat
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        return
+                try:
+                    yield self.queue.get(timeout=wait)
+                except queue.Empty:
+                    yield None
+        finally:
+            self.close()
+
+    def close(self):
+        self._broadcaster._unsubscribe(self)
+
+
+class OrderEventBroadcaster:
+    # In-process fan-out of order events to SSE subscribers. Keeps the last
+    # `backlog` events so a reconnecting client can resume from Last-Event-ID.
+    # With a backend (e.g. MongoEventBackend) events published on any worker
+    # reach subscribers on every worker.
+    def __init__(self, backlog: int = 500, subscriber_queue: int = 200, backend=None, logger=None):
+        self._recent = deque(maxlen=backlog)
+        self._subscribers = set()
+        self._subscriber_queue = subscriber_queue
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.backend = backend
+        self._logger = logger
+        self.dropped_subscribers = 0
+        self.publish_failures = 0
+
+    def publish(self, event_type: str, data: dict):
+        # Called after the change is committed: a failure here is logged, never
+        # turned into an error response for work that already happened
+        event = {"type": event_type, "data": data}
+        if self.backend is not None:
+            try:
+                self.backend.start(self._deliver)
+                self.backend.publish(event)
+            except Exception:
+                self.publish_failures += 1
+                if self._logger:
+                    self._logger.exception("order event publish failed")
+        else:
+            event["id"] = str(next(self._ids))
+            self._deliver(event)
+
+    def subscribe(self, last_event_id: str = None) -> Subscription:
+        # The backend (and its Mongo connection) starts on first use, not at import
+        if self.backend is not None:
+            self.backend.start(self._deliver)
+        sub = Subscription(self, self._subscriber_queue)
+        with self._lock:
+            if last_event_id:
+                ids = [e["id"] for e in self._recent]
+                # Unknown id (too old or from another process): replay all we have
+                start = ids.index(last_event_id) + 1 if last_event_id in ids else 0
+                for event in list(self._recent)[start:]:
+                    sub.queue.put_nowait(event)
+            self._subscribers.add(sub)
+        return sub
+
+    def last_event_id(self) -> str:
+        # For a page rendered now: resuming the stream from this id replays
+        # whatever was published in between ("0" matches nothing, so all of it)
+        with self._lock:
+            return self._recent[-1]["id"] if self._recent else "0"
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def stats(self) -> dict:
+        out = {
+            "subscribers": self.subscriber_count(),
+            "dropped_subscribers": self.dropped_subscribers,
+            "publish_failures": self.publish_failures,
+        }
+        if self.backend is not None:
+            out["backend_dropped"] = getattr(self.backend, "dropped", 0)
+            out["backend_insert_failures"] = getattr(self.backend, "insert_failures", 0)
+        return out
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def _deliver(self, event: dict):
+        with self._lock:
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # Slow client: end its stream, it will reconnect and resume
+                sub.overflowed = True
+                self.dropped_subscribers += 1
+                self._unsubscribe(sub)
+
+
+class MongoEventBackend:
+    # Cross-worker delivery through a capped collection. Every worker inserts
+    # its events and tails the collection, so ids are the Mongo ObjectIds.
+    # Inserts go through a queue and a background thread, like EventWriter,
+    # so publishing never waits on Mongo.
+    def __init__(self, get_db, collection: str = "order_events",
+                 size_bytes: int = 8 * 1024 * 1024, max_queue: int = 10000,
+                 batch_size: int = 100, logger=None):
+        self._get_db = get_db
+        self._name = collection
+        self._size = size_bytes
+        self._logger = logger
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._publisher = None
+        self._tail_thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self.dropped = 0
+        self.insert_failures = 0
+
+    def _collection(self):
+        # Create the capped collection once, before the first insert or tail:
+        # an insert into a missing collection would create an uncapped one,
+        # which can't be tailed
+        from pymongo.errors import CollectionInvalid
+
+        db = self._get_db()
+        if self._ready:
+            return db[self._name]
+        with self._ready_lock:
+            if not self._ready:
+                try:
+                    db.create_collection(self._name, capped=True, size=self._size)
+                except CollectionInvalid:
+                    if not db[self._name].options().get("capped"):
+                        if self._logger:
+                            self._logger.warning("%s is not capped; converting it", self._name)
+                        db.command("convertToCapped", self._name, size=self._size)
+                self._ready = True
+        return db[self._name]
+
+    def publish(self, event: dict):
+        self._ensure_publisher()
+        try:
+            self._queue.put_nowait({"type": event["type"], "data": event["data"], "ts": time.time()})
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_publisher(self):
+        # Started lazily (and again after a fork), as in EventWriter
+        if self._publisher is not None and self._publisher.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._publisher is not None and self._publisher.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._publisher = threading.Thread(target=self._publish_loop, name="order-events-publish",
+                                               daemon=True)
+            self._publisher.start()
+
+    def _publish_loop(self):
+        while True:
+            docs = [self._queue.get()]
+            while len(docs) < self.batch_size:
+                try:
+                    docs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._collection().insert_many(docs, ordered=True)
+            except Exception:
+                self.insert_failures += len(docs)
+                if self._logger:
+                    self._logger.exception("order event insert failed")
+
+    def start(self, deliver):
+        # Safe to call on every publish/subscribe; threads start once per process
+        self._ensure_publisher()
+        if self._tail_thread is not None and self._tail_thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._tail_thread is not None and self._tail_thread.is_alive() and self._pid == os.getpid():
+                return
+            self._tail_thread = threading.Thread(target=self._tail, args=(deliver,),
+                                                 name="order-events-tail", daemon=True)
+            self._tail_thread.start()
+
+    def _tail(self, deliver):
+        from pymongo import CursorType
+
+        last_id = None
+        while True:
+            try:
+                coll = self._collection()
+                if last_id is None:
+                    newest = list(coll.find({}, {"_id": 1}).sort("$natural", -1).limit(1))
+                    last_id = newest[0]["_id"] if newest else None
+                query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+                cursor = coll.find(query, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    for doc in cursor:
+                        last_id = doc["_id"]
+                        deliver({"id": str(doc["_id"]), "type": doc["type"], "data": doc["data"]})
+                time.sleep(0.5)
+            except Exception:
+                if self._logger:
+                    self._logger.exception("order event tail failed; retrying")
+                time.sleep(2)
+
+
+def format_sse(event, dumps=json.dumps) -> str:
+    if event is None:
+        return ": keep-alive\n\n"
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {dumps(event['data'])}\n\n"
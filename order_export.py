@@ -0,0 +1,70 @@
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from pagination import order_page_filters
+
+# One row per order line; orders without lines still get a row (item columns empty)
+EXPORT_COLUMNS = (
+    "order_id", "created_at", "status", "user_id", "email", "order_total",
+    "hidden_from_admin", "menu_id", "item_name", "unit_price", "quantity", "line_total",
+)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _export_sql(conditions) -> str:
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"""
+        SELECT o.id AS order_id, o.created_at, o.status, o.user_id, u.email,
+               o.total AS order_total, o.hidden_from_admin,
+               oi.menu_id, oi.item_name, oi.unit_price, oi.quantity, oi.line_total
+        FROM orders o
+        JOIN users u ON u.id = o.user_id
+        LEFT JOIN order_items oi ON oi.order_id = o.id
+        {where}
+        ORDER BY o.created_at, o.id, oi.id
+    """
+
+
+def _plain(value):
+    # Values both writers can emit as-is
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def export_batches(engine, page: dict, batch_size: int = 1000):
+    # Yields lists of row tuples. stream_results gives a server-side cursor
+    # (pymysql's SSCursor), so only one batch is ever held in memory.
+    conditions, params = order_page_filters(dict(page, cursor=None), alias="o")
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            text(_export_sql(conditions)), params
+        )
+        for batch in result.partitions(batch_size):
+            yield [tuple(_plain(v) for v in row) for row in batch]
+
+
+def ndjson_chunks(batches, dumps):
+    for batch in batches:
+        yield "".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in batch)
+
+
+def csv_chunks(batches):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    # Header only, for an empty export
+    if buf.tell():
+        yield buf.getvalue()
@@ -0,0 +1,54 @@
+import sys
+
+from sqlalchemy import text
+
+# Columns every order-line read selects; the names match the API's item keys
+ITEM_COLUMNS = "menu_id, item_name AS name, unit_price AS price, quantity, line_total"
+
+
+def _backfill_sql(dialect: str) -> str:
+    if dialect == "mysql":
+        return """
+            UPDATE order_items oi
+            JOIN menu m ON m.id = oi.menu_id
+            SET oi.item_name = m.name,
+                oi.unit_price = m.price,
+                oi.line_total = ROUND(m.price * oi.quantity, 2)
+            WHERE oi.id > :lo AND oi.id <= :hi AND oi.unit_price IS NULL
+        """
+    return """
+        UPDATE order_items
+        SET item_name = (SELECT name FROM menu WHERE menu.id = order_items.menu_id),
+            unit_price = (SELECT price FROM menu WHERE menu.id = order_items.menu_id),
+            line_total = ROUND((SELECT price FROM menu WHERE menu.id = order_items.menu_id) * quantity, 2)
+        WHERE id > :lo AND id <= :hi AND unit_price IS NULL
+          AND menu_id IN (SELECT id FROM menu)
+    """
+
+
+def backfill(engine, batch_size: int = 5000, log=print) -> int:
+    # Fills item_name/unit_price/line_total on lines written before migration
+    # 005 from the current menu. One short transaction per id range, so
+    # checkout isn't blocked behind a long table-wide UPDATE. Lines whose menu
+    # item no longer exists stay NULL. Safe to re-run.
+    with engine.connect() as conn:
+        max_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM order_items")).scalar()
+    sql = text(_backfill_sql(engine.dialect.name))
+
+    updated = 0
+    for lo in range(0, max_id, batch_size):
+        with engine.begin() as conn:
+            updated += conn.execute(sql, {"lo": lo, "hi": lo + batch_size}).rowcount
+        log(f"order_items up to id {min(lo + batch_size, max_id)}: {updated} rows updated")
+    return updated
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["backfill"] or len(sys.argv) > 3:
+        print("usage: python -m order_items backfill [batch_size]")
+        sys.exit(2)
+
+    from db import mysql_engine
+
+    backfill(mysql_engine, batch_size=int(sys.argv[2]) if len(sys.argv) == 3 else 5000)
+    sys.exit(0)
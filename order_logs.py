@@ -0,0 +1,134 @@
+import threading
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_LOG_PAGE = 100
+MAX_LOG_PAGE = 500
+# Logs attached to a single order response; an order rarely has more than a few
+MAX_LOGS_PER_ORDER = 200
+
+
+class LogQueryError(ValueError):
+    pass
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).strip())
+        except ValueError:
+            raise LogQueryError(f"Invalid date: {value!r}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _parse_cursor(cursor: str) -> ObjectId:
+    try:
+        return ObjectId(cursor)
+    except (InvalidId, TypeError):
+        raise LogQueryError("Invalid cursor")
+
+
+def _without_id(doc: dict) -> dict:
+    doc.pop("_id", None)
+    return doc
+
+
+class OrderLogs:
+    # All reads of order_logs go through here so every query is indexed,
+    # projected and bounded. Pages are ordered by _id, newest first: ObjectIds
+    # start with their creation time, so since/until become _id range bounds
+    # and older documents without a `ts` field page the same way.
+    def __init__(self, get_collection, ttl_days: float = 0, logger=None):
+        self._get_collection = get_collection
+        self.ttl_days = ttl_days
+        self._logger = logger
+        self._indexed = False
+        self._lock = threading.Lock()
+
+    def collection(self):
+        coll = self._get_collection()
+        if not self._indexed:
+            with self._lock:
+                if not self._indexed:
+                    self.ensure_indexes(coll)
+        return coll
+
+    def ensure_indexes(self, coll=None):
+        # create_index is a no-op when the index already exists
+        coll = coll if coll is not None else self._get_collection()
+        try:
+            coll.create_index("order_id", name="order_id_1")
+            coll.create_index([("user_id", 1), ("_id", -1)], name="user_id_1__id_-1")
+            if self.ttl_days:
+                # Only documents with a BSON date in `ts` expire
+                coll.create_index("ts", name="ts_ttl",
+                                  expireAfterSeconds=int(self.ttl_days * 86400))
+            self._indexed = True
+        except Exception:
+            # Reads still work without the indexes; try again on the next call
+            if self._logger:
+                self._logger.exception("order_logs index creation failed")
+
+    def for_order(self, order_id: int, limit: int = MAX_LOGS_PER_ORDER) -> list:
+        cursor = (self.collection()
+                  .find({"order_id": order_id}, {"_id": 0})
+                  .sort("_id", 1)
+                  .limit(limit))
+        return list(cursor)
+
+    def for_orders(self, order_ids) -> dict:
+        # order_id -> logs, oldest first
+        out = {}
+        if not order_ids:
+            return out
+        cursor = (self.collection()
+                  .find({"order_id": {"$in": list(order_ids)}}, {"_id": 0})
+                  .sort("_id", 1)
+                  .limit(MAX_LOGS_PER_ORDER * len(order_ids)))
+        for log in cursor:
+            out.setdefault(log.get("order_id"), []).append(log)
+        return out
+
+    def _query(self, user_id=None, order_id=None, since=None, until=None, cursor=None) -> dict:
+        query = {}
+        if user_id is not None:
+            query["user_id"] = user_id
+        if order_id is not None:
+            query["order_id"] = order_id
+        id_range = {}
+        if since:
+            id_range["$gte"] = ObjectId.from_datetime(_parse_time(since))
+        if until:
+            id_range["$lt"] = ObjectId.from_datetime(_parse_time(until))
+        if cursor:
+            after = _parse_cursor(cursor)
+            if "$lt" not in id_range or after < id_range["$lt"]:
+                id_range["$lt"] = after
+        if id_range:
+            query["_id"] = id_range
+        return query
+
+    def page(self, limit: int = DEFAULT_LOG_PAGE, cursor: str = None, **filters):
+        # -> (logs, next_cursor); next_cursor is None on the last page
+        limit = max(1, min(int(limit), MAX_LOG_PAGE))
+        docs = list(self.collection()
+                    .find(self._query(cursor=cursor, **filters))
+                    .sort("_id", -1)
+                    .limit(limit + 1))
+        next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+        return [_without_id(doc) for doc in docs[:limit]], next_cursor
+
+    def stream(self, batch_size: int = 500, **filters):
+        # Builds the query up front (so bad filters raise here) and returns an
+        # iterator; the driver fetches batch_size documents at a time
+        cursor = (self.collection()
+                  .find(self._query(**filters))
+                  .sort("_id", -1)
+                  .batch_size(batch_size))
+        return (_without_id(doc) for doc in cursor)
@@ -0,0 +1,106 @@
+from sqlalchemy import bindparam, text
+
+# target status -> statuses an order may move to it from. Each target has a
+# single source, so the number of orders moved is also the count that left it.
+TRANSITIONS = {
+    "confirmed": ("pending",),
+    "completed": ("confirmed",),
+}
+
+MAX_BULK_ORDERS = 500
+
+UPDATED = "updated"
+CONFLICT = "conflict"
+NOT_FOUND = "not_found"
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def allowed_from(new_status: str):
+    if new_status not in TRANSITIONS:
+        raise InvalidTransition(f"Invalid status. Allowed: {sorted(TRANSITIONS)}")
+    return TRANSITIONS[new_status]
+
+
+def transition(conn, order_ids, new_status: str):
+    # -> ([ids this call moved], {order_id: (outcome, current_status)})
+    sources = allowed_from(new_status)
+    order_ids = list(dict.fromkeys(order_ids))
+    if len(order_ids) == 1:
+        return _transition_one(conn, order_ids[0], new_status, sources)
+
+    # Several ids: lock and read them first so the caller knows which ones
+    # this request moved, as opposed to ones that were already there
+    select = "SELECT id, status FROM orders WHERE id IN :ids"
+    if conn.dialect.name == "mysql":
+        select += " FOR UPDATE"
+    current = dict(conn.execute(
+        text(select).bindparams(bindparam("ids", expanding=True)), {"ids": order_ids}
+    ).fetchall())
+
+    moved = [order_id for order_id in order_ids if current.get(order_id) in sources]
+    if moved:
+        conn.execute(
+            text("UPDATE orders SET status = :new_status WHERE id IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"new_status": new_status, "ids": moved}
+        )
+
+    outcomes = {}
+    for order_id in order_ids:
+        status = current.get(order_id)
+        if status is None:
+            outcomes[order_id] = (NOT_FOUND, None)
+        elif status in sources or status == new_status:
+            outcomes[order_id] = (UPDATED, new_status)
+        else:
+            outcomes[order_id] = (CONFLICT, status)
+    return moved, outcomes
+
+
+def _transition_one(conn, order_id, new_status, sources):
+    # One conditional UPDATE; the row is only read back when it didn't move,
+    # to tell a missing order from one in the wrong state
+    moved = conn.execute(
+        text("""
+            UPDATE orders SET status = :new_status
+            WHERE id = :id AND status IN :sources
+        """).bindparams(bindparam("sources", expanding=True)),
+        {"new_status": new_status, "id": order_id, "sources": list(sources)}
+    ).rowcount
+    if moved:
+        return [order_id], {order_id: (UPDATED, new_status)}
+
+    row = conn.execute(text("SELECT status FROM orders WHERE id = :id"), {"id": order_id}).fetchone()
+    if row is None:
+        return [], {order_id: (NOT_FOUND, None)}
+    if row[0] == new_status:
+        # Already where the caller wants it
+        return [], {order_id: (UPDATED, new_status)}
+    return [], {order_id: (CONFLICT, row[0])}
+
+
+def hide(conn, order_id: int):
+    # Only completed orders can leave the admin board. -> outcome
+    hidden = conn.execute(
+        text("""
+            UPDATE orders SET hidden_from_admin = 1
+            WHERE id = :id AND status = 'completed' AND hidden_from_admin = 0
+        """),
+        {"id": order_id}
+    ).rowcount
+    if hidden:
+        return UPDATED
+
+    row = conn.execute(
+        text("SELECT status, hidden_from_admin FROM orders WHERE id = :id"),
+        {"id": order_id}
+    ).fetchone()
+    if row is None:
+        return NOT_FOUND
+    if (row[0] or "").lower() != "completed":
+        return CONFLICT
+    return None  # already hidden
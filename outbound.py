@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import Histogram
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures; while open, calls
+    # fail immediately. After `reset_timeout` one trial call is let through
+    # (half-open): success closes the circuit, failure re-opens it.
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True  # the single trial call
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.latency = Histogram()
+        self._lock = threading.Lock()
+
+    def add(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class OutboundClient:
+    # One keep-alive Session per host, so repeat calls to the audit function
+    # or the Translation API skip the TCP + TLS handshake. Connection errors
+    # (nothing was sent) are retried; 5xx, timeouts and connection errors
+    # count towards the host's circuit breaker.
+    def __init__(self, pool_size: int = 10, timeout: float = 5.0, retries: int = 1,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._sessions = {}
+        self._breakers = {}
+        self._stats = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def _host(self, host: str):
+        # -> (session, breaker, stats); sessions are not shared across a fork
+        with self._lock:
+            if self._pid != os.getpid():
+                self._sessions.clear()
+                self._pid = os.getpid()
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    max_retries=Retry(total=self.retries, connect=self.retries, read=0,
+                                      status=0, other=0, backoff_factor=0.1),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            breaker = self._breakers.setdefault(
+                host, CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            )
+            stats = self._stats.setdefault(host, HostStats())
+        return session, breaker, stats
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        session, breaker, stats = self._host(host)
+        if not breaker.allow():
+            stats.add("rejected")
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            stats.add("failures")
+            breaker.record_failure()
+            raise
+        finally:
+            stats.add("requests")
+            stats.latency.observe(time.perf_counter() - start)
+
+        if response.status_code >= 500:
+            stats.add("failures")
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    @staticmethod
+    def _connection_counts(session):
+        # urllib3 counts connections opened and requests sent per pool
+        opened = sent = 0
+        for adapter in set(session.adapters.values()):
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return opened, sent
+
+    def stats(self) -> dict:
+        with self._lock:
+            hosts = list(self._stats.items())
+            sessions = dict(self._sessions)
+            breakers = dict(self._breakers)
+
+        out = {}
+        for host, s in hosts:
+            opened, sent = self._connection_counts(sessions[host]) if host in sessions else (0, 0)
+            out[host] = {
+                "requests": s.requests,
+                "failures": s.failures,
+                "rejected": s.rejected,
+                "circuit": breakers[host].state,
+                "times_opened": breakers[host].times_opened,
+                "connections_opened": opened,
+                "reuse_ratio": round(1 - opened / sent, 3) if sent else None,
+                "latency": s.latency.snapshot(),
+            }
+        return {
+            "open_circuits": sum(1 for b in breakers.values() if b.state != CLOSED),
+            "hosts": out,
+        }
@@ -0,0 +1,108 @@
+import base64
+import json
+from datetime import date, datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+ORDER_STATUSES = {"pending", "confirmed", "completed"}
+
+
+class PageArgsError(ValueError):
+    pass
+
+
+def _to_db_time(value) -> str:
+    # Bound as a canonical "YYYY-MM-DD HH:MM:SS[.ffffff]" string so MySQL and
+    # SQLite compare it against created_at the same way
+    if not isinstance(value, datetime):
+        if isinstance(value, date):
+            value = datetime(value.year, value.month, value.day)
+        else:
+            value = datetime.fromisoformat(str(value))
+    return value.isoformat(sep=" ")
+
+
+def encode_cursor(created_at, order_id: int) -> str:
+    raw = json.dumps([_to_db_time(created_at), order_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, order_id = json.loads(base64.urlsafe_b64decode(padded))
+        return _to_db_time(created_at), int(order_id)
+    except Exception:
+        raise PageArgsError("Invalid cursor")
+
+
+def parse_page_args(args) -> dict:
+    # limit / cursor / status / since / until from the query string
+    try:
+        limit = int(args.get("limit") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise PageArgsError("limit must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    status = (args.get("status") or "").strip().lower() or None
+    if status and status not in ORDER_STATUSES:
+        raise PageArgsError(f"Invalid status. Allowed: {sorted(ORDER_STATUSES)}")
+
+    bounds = {}
+    for key in ("since", "until"):
+        value = (args.get(key) or "").strip()
+        if value:
+            try:
+                bounds[key] = _to_db_time(value)
+            except ValueError:
+                raise PageArgsError(f"{key} must be an ISO date or datetime")
+
+    cursor = args.get("cursor")
+    return {
+        "limit": limit,
+        "status": status,
+        "since": bounds.get("since"),
+        "until": bounds.get("until"),
+        "cursor": decode_cursor(cursor) if cursor else None,
+    }
+
+
+def order_page_filters(page: dict, alias: str = ""):
+    # SQL conditions + bind params for filters and the (created_at, id) keyset.
+    # Pair with order_page_suffix() so the ORDER BY matches the keyset.
+    col = f"{alias}." if alias else ""
+    conditions, params = [], {}
+
+    if page["status"]:
+        conditions.append(f"{col}status = :page_status")
+        params["page_status"] = page["status"]
+    if page["since"]:
+        conditions.append(f"{col}created_at >= :page_since")
+        params["page_since"] = page["since"]
+    if page["until"]:
+        conditions.append(f"{col}created_at < :page_until")
+        params["page_until"] = page["until"]
+    if page["cursor"]:
+        conditions.append(
+            f"({col}created_at < :cursor_created_at"
+            f" OR ({col}created_at = :cursor_created_at AND {col}id < :cursor_id))"
+        )
+        params["cursor_created_at"], params["cursor_id"] = page["cursor"]
+
+    return conditions, params
+
+
+def order_page_suffix(page: dict, alias: str = ""):
+    col = f"{alias}." if alias else ""
+    # One extra row tells us whether there is a next page
+    return f"ORDER BY {col}created_at DESC, {col}id DESC LIMIT {page['limit'] + 1}"
+
+
+def split_page(rows: list, page: dict):
+    # -> (rows for this page, cursor for the next page or None)
+    if len(rows) <= page["limit"]:
+        return rows, None
+    rows = rows[:page["limit"]]
+    last = rows[-1]
+    return rows, encode_cursor(last["created_at"], last["id"])
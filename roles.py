@@ -0,0 +1,88 @@
+import hashlib
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+ADMIN = "admin"
+USER = "user"
+
+
+class RoleResolver:
+    # Resolves an email to a role. ADMIN_EMAIL is parsed once per distinct
+    # value rather than on every call; with use_table the roles table is
+    # consulted too, with lookups cached for `ttl` seconds.
+    def __init__(self, get_engine=None, use_table: bool = False, ttl: float = 60.0):
+        self._get_engine = get_engine
+        self.use_table = use_table and get_engine is not None
+        self.ttl = ttl
+        self._raw = None
+        self._admins = frozenset()
+        self._digest = ""
+        self._table_cache = {}
+        self._lock = threading.Lock()
+
+    def admin_emails(self) -> frozenset:
+        raw = os.getenv("ADMIN_EMAIL") or ""
+        if raw != self._raw:
+            with self._lock:
+                self._admins = frozenset(e.strip().lower() for e in raw.split(",") if e.strip())
+                self._digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+                self._raw = raw
+        return self._admins
+
+    def version(self) -> str:
+        # Changes whenever a cached session role may be out of date. Runs on
+        # every is_admin(), so the hash is only recomputed when ADMIN_EMAIL
+        # changes
+        self.admin_emails()
+        if self.use_table:
+            return f"{self._digest}.{int(time.time() // self.ttl)}"
+        return self._digest
+
+    def role_for(self, email: str) -> str:
+        email = (email or "").lower()
+        if not email:
+            return USER
+        if email in self.admin_emails():
+            return ADMIN
+        if self.use_table:
+            return self._table_role(email)
+        return USER
+
+    def _table_role(self, email: str) -> str:
+        entry = self._table_cache.get(email)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        with self._get_engine().connect() as conn:
+            role = conn.execute(
+                text("SELECT role FROM roles WHERE email = :email"), {"email": email}
+            ).scalar()
+        role = role or USER
+        self._table_cache[email] = (role, time.monotonic() + self.ttl)
+        return role
+
+
+def upsert_user(conn, email: str, name) -> int:
+    # One round trip whether or not the user exists yet
+    if conn.dialect.name == "mysql":
+        # LAST_INSERT_ID(id) makes lastrowid the existing row's id on conflict
+        result = conn.execute(
+            text("""
+                INSERT INTO users (email, name) VALUES (:email, :name)
+                ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+            """),
+            {"email": email, "name": name}
+        )
+        return result.lastrowid
+
+    # SQLite / Postgres (local runs and tests)
+    return conn.execute(
+        text("""
+            INSERT INTO users (email, name) VALUES (:email, :name)
+            ON CONFLICT (email) DO UPDATE SET email = excluded.email
+            RETURNING id
+        """),
+        {"email": email, "name": name}
+    ).scalar()
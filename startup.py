@@ -0,0 +1,26 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Cold-start breakdown: how long each init step took, in milliseconds
+timings = {}
+_lock = threading.Lock()
+
+
+def record(step: str, seconds: float):
+    with _lock:
+        timings[step] = round(seconds * 1000.0, 2)
+
+
+@contextmanager
+def timed(step: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(step, time.perf_counter() - start)
+
+
+def report() -> dict:
+    with _lock:
+        return dict(timings)
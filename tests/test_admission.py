@@ -0,0 +1,58 @@
+import threading
+
+from tests.conftest import login_session
+
+def _checkout(client):
+    return client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+
+def test_checkout_burst_is_rate_limited_per_user(client, local_db, app_module, monkeypatch):
+    monkeypatch.setitem(app_module.admission_control.limits, "checkout", app_module.admission.Limit(1, 3))
+    login_session(client, user_id=1)
+    assert [_checkout(client).status_code for _ in range(4)] == [200, 200, 200, 429]
+
+    res = _checkout(client)
+    assert res.status_code == 429 and int(res.headers["Retry-After"]) >= 1
+
+    # Another user has their own bucket
+    login_session(client, email="other@example.com", user_id=2, uid="other")
+    assert _checkout(client).status_code == 200
+
+    counts = app_module.admission_control.stats()["routes"]["checkout"]
+    assert counts == {"admitted": 4, "rate_limited": 2, "overloaded": 0}
+
+def test_inflight_cap_sheds_with_503(client, local_db, app_module, monkeypatch):
+    control = app_module.admission.AdmissionController({}, max_inflight=1)
+    monkeypatch.setattr(app_module, "admission_control", control)
+    entered, release = threading.Event(), threading.Event()
+
+    @control.limit("translate")
+    def slow():
+        entered.set()
+        release.wait(5)
+        return "done"
+
+    worker = threading.Thread(target=slow)
+    worker.start()
+    assert entered.wait(5)
+    with app_module.app.test_request_context():
+        body, status, headers = slow()
+    release.set()
+    worker.join()
+
+    assert status == 503 and headers["Retry-After"] == "1"
+    assert control.stats()["routes"]["translate"] == {"admitted": 1, "rate_limited": 0, "overloaded": 1}
+    assert control.stats()["peak_inflight"] == 1 and control.stats()["inflight"] == 0
+
+def test_pluggable_backend(client, app_module, monkeypatch):
+    calls = []
+
+    class Backend:
+        def take(self, key, limit):
+            calls.append(key)
+            return 2.5
+
+    monkeypatch.setattr(app_module.admission_control, "backend", Backend())
+    login_session(client, user_id=7)
+    res = client.post("/api/translate", json={"text": "hello", "target": "es"})
+    assert res.status_code == 429 and res.headers["Retry-After"] == "3"
+    assert calls == ["translate:7"]
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import text
+
+import analytics
+from benchmarks.localdb import RoundTripCounter, make_engine, seed, seed_orders
+from tests.conftest import login_session
+
+def test_checkout_and_status_changes_feed_the_rollups(client, local_db, app_module):
+    login_session(client, user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 2}, {"menu_id": 2, "quantity": 1}]})
+    order_id = client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]}).get_json()["order_id"]
+
+    login_session(client, email="admin@example.com", user_id=1)
+    client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"})
+    app_module.sales_rollups.flush()
+
+    counter = RoundTripCounter(local_db.engine)
+    data = client.get("/api/admin/analytics?days=7&top=1").get_json()
+    assert counter.count == 3  # one read per rollup table
+
+    assert data["orders_by_status"] == {"pending": 1, "confirmed": 1}
+    (day,) = data["daily_revenue"]
+    assert day["day"] == analytics.today() and day["orders"] == 2
+    assert day["revenue"] == pytest.approx(3 * 3.25 + 4.0)  # seed prices: item 1 3.25, item 2 4.00
+    assert data["top_items"] == [{"menu_id": 1, "name": "Item 1", "quantity": 3, "revenue": 9.75}]
+
+def test_backfill_rebuilds_from_orders():
+    engine = make_engine()
+    seed(engine)
+    seed_orders(engine, orders=60)
+
+    assert analytics.rebuild(engine) == {"sales_daily": 60, "sales_status": 3, "sales_items": 20}
+    with engine.connect() as conn:
+        data = analytics.summary(conn, top=100)
+        assert sum(data["orders_by_status"].values()) == 60
+        assert sum(i["quantity"] for i in data["top_items"]) == conn.execute(
+            text("SELECT SUM(quantity) FROM order_items")).scalar()
+
+def test_failed_flush_keeps_deltas_for_the_next_one():
+    engine = make_engine()
+    writer = analytics.RollupWriter(lambda: engine)
+    writer.status_changed("pending", "confirmed")
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE sales_status"))
+    with pytest.raises(Exception):
+        writer.flush()
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE sales_status (status TEXT PRIMARY KEY, orders INTEGER)"))
+    writer.flush()
+    with engine.connect() as conn:
+        rows = dict(conn.execute(text("SELECT status, orders FROM sales_status")).fetchall())
+    assert rows == {"pending": -1, "confirmed": 1}
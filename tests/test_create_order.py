@@ -0,0 +1,41 @@
+from sqlalchemy import text
+
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def test_create_order_batches_price_lookup_and_items(client, local_db):
+    login_session(client, user_id=1)
+    client.get("/api/menu")  # warm the menu cache
+    counter = RoundTripCounter(local_db.engine)
+
+    items = [
+        {"menu_id": 1, "quantity": 2},
+        {"menu_id": 2, "quantity": 1},
+        {"menu_id": 999, "quantity": 1},  # unknown item is skipped
+        {"menu_id": 3, "quantity": 0},    # invalid quantity is skipped
+    ]
+    res = client.post("/api/order", json={"items": items})
+    assert res.status_code == 200
+    order_id = res.get_json()["order_id"]
+
+    # prices come from the menu cache (999 falls back to one IN lookup),
+    # then the orders insert + one executemany for order_items
+    assert counter.count == 3
+
+    with local_db.engine.connect() as conn:
+        prices = dict(conn.execute(text("SELECT id, price FROM menu")).fetchall())
+        total = conn.execute(
+            text("SELECT total FROM orders WHERE id = :id"), {"id": order_id}
+        ).scalar()
+        lines = conn.execute(
+            text("SELECT menu_id, quantity FROM order_items WHERE order_id = :id ORDER BY menu_id"),
+            {"id": order_id}
+        ).fetchall()
+
+    assert [tuple(r) for r in lines] == [(1, 2), (2, 1)]
+    assert float(total) == float(prices[1]) * 2 + float(prices[2])
+
+def test_create_order_empty_items_400(client, local_db):
+    login_session(client)
+    res = client.post("/api/order", json={"items": []})
+    assert res.status_code == 400
@@ -0,0 +1,81 @@
+import threading
+
+from event_writer import EventWriter
+from benchmarks.localdb import FakeCollection
+from tests.conftest import login_session
+
+def test_events_are_batched_into_insert_many_and_audit_posts():
+    coll = FakeCollection()
+    calls = {"insert_many": 0, "audit": []}
+    real_insert_many = coll.insert_many
+
+    def insert_many(docs, ordered=True):
+        calls["insert_many"] += 1
+        real_insert_many(docs, ordered)
+
+    coll.insert_many = insert_many
+    writer = EventWriter(lambda: coll, calls["audit"].append, batch_size=50, flush_interval=5)
+
+    for i in range(10):
+        writer.log({"order_id": i})
+    writer.audit({"order_id": 1, "user_id": 1, "total": 5.0})
+    assert writer.flush()
+
+    assert len(coll.docs) == 10
+    assert calls["insert_many"] == 1
+    assert calls["audit"] == [[{"order_id": 1, "user_id": 1, "total": 5.0}]]
+    stats = writer.stats()
+    assert stats["logs_written"] == 10 and stats["audits_sent"] == 1
+
+def test_full_queue_drops_instead_of_blocking():
+    release = threading.Event()
+    coll = FakeCollection()
+
+    def blocked_collection():
+        release.wait(5)
+        return coll
+
+    writer = EventWriter(blocked_collection, lambda events: None,
+                         max_queue=1, batch_size=1, flush_interval=0)
+    results = [writer.log({"n": i}) for i in range(5)]
+    release.set()
+    writer.flush()
+
+    assert False in results
+    assert writer.stats()["dropped"] >= 1
+
+def test_failed_audit_batch_is_counted():
+    def broken(events):
+        raise RuntimeError("audit down")
+
+    writer = EventWriter(FakeCollection, broken, flush_interval=5)
+    writer.audit({"order_id": 1})
+    writer.flush()
+    assert writer.stats()["audits_failed"] == 1
+
+def test_partial_audit_failure_counts_each_event(app_module, monkeypatch):
+    import requests
+
+    def post(url, json, timeout):
+        res = requests.Response()
+        res.status_code = 503 if json["order_id"] == 2 else 200
+        return res
+
+    monkeypatch.setenv("AUDIT_FUNCTION_URL", "http://audit.invalid/")
+    monkeypatch.setattr(app_module.outbound, "post", post)
+    writer = EventWriter(FakeCollection, app_module.post_audit_batch, flush_interval=5)
+    for order_id in (1, 2, 3):
+        writer.audit({"order_id": order_id})
+    writer.flush()
+
+    stats = writer.stats()
+    assert stats["audits_sent"] == 2 and stats["audits_failed"] == 1
+
+def test_create_order_log_written_off_request_path(client, local_db, app_module):
+    login_session(client, user_id=1)
+    res = client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+    order_id = res.get_json()["order_id"]
+
+    app_module.event_writer.flush()
+    logs = list(local_db.mongo["order_logs"].find({"order_id": order_id}))
+    assert logs and logs[0]["message"] == "Order created"
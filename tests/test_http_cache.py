@@ -0,0 +1,63 @@
+import gzip
+import json
+
+from flask import url_for
+from sqlalchemy import text
+
+from benchmarks.localdb import seed_orders
+from tests.conftest import login_session
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+def test_large_json_is_gzipped_and_counted(client, local_db):
+    seed_orders(local_db.engine, orders=100)
+    login_session(client, email="admin@example.com")
+
+    plain = client.get("/api/admin/orders?limit=100")
+    res = client.get("/api/admin/orders?limit=100", headers=GZIP)
+    assert "Content-Encoding" not in plain.headers
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["Vary"]
+    assert json.loads(gzip.decompress(res.data)) == plain.get_json()
+
+    stats = client.get("/api/admin/metrics").get_json()["response_bytes"]["GET /api/admin/orders"]
+    assert stats["responses"] == 2 and stats["compressed"] == 1
+    assert stats["bytes_saved"] > len(plain.data) // 2
+
+def test_small_responses_are_left_alone(client, local_db):
+    login_session(client)
+    res = client.get("/api/orders", headers=GZIP)
+    assert res.status_code == 200 and "Content-Encoding" not in res.headers
+
+def test_menu_etag_survives_compression(client, local_db):
+    with local_db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO menu (name, price) VALUES (:name, 5)"),
+                     [{"name": f"Special {i}"} for i in range(40)])
+    login_session(client)
+    res = client.get("/api/menu", headers=GZIP)
+    assert res.headers["Content-Encoding"] == "gzip"
+    etag = res.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/api/menu", headers=dict(GZIP, **{"If-None-Match": etag})).status_code == 304
+
+def test_completed_order_detail_is_conditional(client, local_db):
+    login_session(client, user_id=1)
+    order_id = client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]}).get_json()["order_id"]
+    assert "ETag" not in client.get(f"/api/order/{order_id}").headers
+
+    login_session(client, email="admin@example.com", user_id=1)
+    for status in ("confirmed", "completed"):
+        client.patch(f"/api/order/{order_id}/status", json={"status": status})
+
+    etag = client.get(f"/api/order/{order_id}").headers["ETag"]
+    res = client.get(f"/api/order/{order_id}", headers={"If-None-Match": etag})
+    assert res.status_code == 304 and res.data == b""
+
+def test_static_urls_are_versioned_and_immutable(client, app_module):
+    with app_module.app.test_request_context():
+        url = url_for("static", filename="style.css")
+    assert "?v=" in url
+
+    res = client.get(url)
+    assert res.headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert "immutable" not in client.get("/static/style.css").headers.get("Cache-Control", "")
@@ -0,0 +1,90 @@
+import threading
+
+from sqlalchemy import text
+
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+ITEMS = {"items": [{"menu_id": 1, "quantity": 2}]}
+
+def _order_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM orders")).scalar()
+
+def test_retry_with_same_key_replays_without_db(client, local_db):
+    login_session(client, user_id=1)
+    first = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    assert first.status_code == 200
+
+    counter = RoundTripCounter(local_db.engine)
+    retry = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert counter.count == 0
+    assert _order_count(local_db.engine) == 1
+
+def test_replay_from_table_on_another_worker(client, local_db, app_module):
+    login_session(client, user_id=1)
+    first = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+
+    app_module.idempotency_store._cache.clear()  # as if the retry hit a different worker
+    retry = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    assert retry.get_json()["order_id"] == first.get_json()["order_id"]
+    assert _order_count(local_db.engine) == 1
+
+def test_key_reused_with_different_body_422(client, local_db):
+    login_session(client, user_id=1)
+    client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    res = client.post("/api/order", json={"items": [{"menu_id": 2, "quantity": 1}]},
+                      headers={"Idempotency-Key": "abc"})
+    assert res.status_code == 422
+
+def test_keys_are_scoped_per_user(client, local_db):
+    login_session(client, user_id=1)
+    a = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    login_session(client, user_id=2)
+    b = client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "abc"})
+    assert a.get_json()["order_id"] != b.get_json()["order_id"]
+
+def test_concurrent_duplicates_create_one_order(local_db, app_module):
+    results = []
+
+    def post():
+        c = app_module.app.test_client()
+        login_session(c, user_id=1)
+        results.append(c.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "race"}).get_json())
+
+    threads = [threading.Thread(target=post) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len({r["order_id"] for r in results}) == 1
+    assert _order_count(local_db.engine) == 1
+
+def test_expired_keys_are_purged(client, local_db, app_module):
+    login_session(client, user_id=1)
+    client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "old"})
+    client.post("/api/order", json=ITEMS, headers={"Idempotency-Key": "new"})
+    with local_db.engine.begin() as conn:
+        conn.execute(text("UPDATE idempotency_keys SET created_at = '2020-01-01 00:00:00' WHERE idem_key = 'old'"))
+
+    assert app_module.idempotency_store.purge() == 1
+    with local_db.engine.connect() as conn:
+        keys = [r[0] for r in conn.execute(text("SELECT idem_key FROM idempotency_keys"))]
+    assert keys == ["new"]
+
+def test_purge_runs_at_most_once_per_interval(app_module, monkeypatch):
+    store = app_module.IdempotencyStore(lambda: None, purge_interval=3600)
+    runs = []
+    monkeypatch.setattr(store, "_purge_logged", lambda: runs.append(1))
+    store.maybe_purge()
+    assert runs == []  # not due yet
+    store._next_purge = 0
+    store.maybe_purge()
+    store.maybe_purge()
+    for t in app_module.threading.enumerate():
+        if t.name == "idempotency-purge":
+            t.join()
+    assert runs == [1]
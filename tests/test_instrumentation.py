@@ -0,0 +1,58 @@
+from tests.conftest import login_session
+
+def _timing(res, name):
+    for part in res.headers["Server-Timing"].split(", "):
+        if part.startswith(name + ";"):
+            return part
+    raise AssertionError(name)
+
+def test_server_timing_reports_query_count(client, local_db):
+    login_session(client, user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+
+    res = client.get("/api/orders/history")
+    assert '"2 queries"' in _timing(res, "db")
+    assert _timing(res, "total").startswith("total;dur=")
+
+def test_cached_menu_runs_no_queries(client, local_db):
+    client.get("/api/menu")
+    res = client.get("/api/menu")
+    assert '"0 queries"' in _timing(res, "db")
+
+def test_metrics_endpoint_aggregates_per_route(client, local_db, app_module):
+    app_module.instrumentation.reset()
+    login_session(client, email="admin@example.com", user_id=1)
+    for _ in range(3):
+        client.get("/api/orders")
+
+    routes = client.get("/api/admin/metrics").get_json()["routes"]
+    stats = routes["GET /api/orders"]
+    assert stats["requests"] == 3
+    assert stats["sql_queries"]["count"] == 3 and stats["sql_queries"]["max_ms"] == 1
+
+def test_external_calls_are_timed(client, monkeypatch, app_module):
+    login_session(client)
+
+    class FakeResp:
+        status_code = 200
+        def json(self):
+            return {"data": {"translations": [{"translatedText": "hola"}]}}
+
+    monkeypatch.setattr(app_module.outbound, "post", lambda *a, **k: FakeResp())
+    monkeypatch.setattr(app_module, "get_translate_key", lambda: "fake-key")
+
+    res = client.post("/api/translate", json={"text": "hello", "target": "es"})
+    assert '"1 calls"' in _timing(res, "ext")
+
+def test_request_metrics_log_emits_fast_requests(app_module, monkeypatch, caplog):
+    import importlib
+    import json
+
+    monkeypatch.setenv("REQUEST_METRICS_LOG", "1")
+    main = importlib.reload(app_module)
+    main.app.test_client().get("/whoami")
+
+    (record,) = [r for r in caplog.records if r.getMessage().startswith("request_metrics ")]
+    assert record.levelname == "INFO"
+    fields = json.loads(record.getMessage().split(" ", 1)[1])
+    assert fields["route"] == "/whoami" and "sql_queries" in fields
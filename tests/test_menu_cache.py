@@ -0,0 +1,24 @@
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def test_menu_served_from_cache_with_etag(client, local_db):
+    res = client.get("/api/menu")
+    assert res.status_code == 200
+    assert res.get_json()["success"] is True
+    etag = res.headers["ETag"]
+
+    counter = RoundTripCounter(local_db.engine)
+    again = client.get("/api/menu", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert counter.count == 0
+
+def test_add_menu_item_invalidates_cache(client, local_db):
+    before = client.get("/api/menu").get_json()["menu"]
+
+    login_session(client, email="admin@example.com")
+    res = client.post("/api/menu", json={"name": "Soup", "price": 4.5})
+    assert res.status_code == 200
+
+    after = client.get("/api/menu").get_json()["menu"]
+    assert len(after) == len(before) + 1
+    assert after[-1]["name"] == "Soup"
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+
+from order_events import OrderEventBroadcaster, format_sse
+from tests.conftest import login_session
+
+def test_subscribers_receive_published_events():
+    b = OrderEventBroadcaster()
+    sub = b.subscribe()
+    b.publish("order_created", {"id": 1})
+
+    event = next(sub.events(heartbeat=0.1))
+    assert event["type"] == "order_created" and event["data"] == {"id": 1}
+
+def test_resume_from_last_event_id_replays_only_newer():
+    b = OrderEventBroadcaster()
+    for i in range(1, 4):
+        b.publish("order_status_changed", {"id": i, "status": "confirmed"})
+
+    sub = b.subscribe(last_event_id="1")
+    events = sub.events(heartbeat=0.05)
+    assert [next(events)["data"]["id"], next(events)["data"]["id"]] == [2, 3]
+    assert next(events) is None  # heartbeat, nothing else buffered
+
+def test_slow_subscriber_is_disconnected_not_blocking():
+    b = OrderEventBroadcaster(subscriber_queue=1)
+    sub = b.subscribe()
+    b.publish("order_hidden", {"id": 1})
+    b.publish("order_hidden", {"id": 2})
+    assert sub.overflowed and b.subscriber_count() == 0
+
+def test_format_sse():
+    assert format_sse({"id": "7", "type": "order_hidden", "data": {"id": 3}}) == \
+        'id: 7\nevent: order_hidden\ndata: {"id": 3}\n\n'
+
+def test_admin_stream_replays_order_created(client, local_db, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "ORDER_STREAM_ENABLED", True)
+    login_session(client, email="admin@example.com", user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+
+    res = client.get("/api/admin/orders/stream?last_event_id=unknown", buffered=False)
+    assert res.mimetype == "text/event-stream"
+    chunks = iter(res.response)
+    assert next(chunks).startswith(b"retry:")
+    event = next(chunks).decode()
+    res.close()
+
+    assert "event: order_created" in event
+    data = json.loads(event.split("data: ", 1)[1])
+    assert data["status"] == "pending" and data["email"] == "admin@example.com"
+
+def test_stream_is_off_without_worker_threads(client, local_db, app_module):
+    # The test app runs as a single-threaded worker (GUNICORN_THREADS unset)
+    assert app_module.ORDER_STREAM_ENABLED is False
+    login_session(client, email="admin@example.com", user_id=1)
+    assert client.get("/api/admin/orders/stream").status_code == 503
+
+def test_stream_admin_only(client, local_db):
+    login_session(client, email="user@example.com")
+    assert client.get("/api/admin/orders/stream").status_code == 403
+
+def test_failed_publish_does_not_fail_committed_work(client, local_db, app_module, monkeypatch):
+    class DownBackend:
+        def publish(self, event):
+            raise RuntimeError("mongo down")
+
+    monkeypatch.setattr(app_module.order_broadcaster, "backend", DownBackend())
+    login_session(client, email="admin@example.com", user_id=1)
+    res = client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+    assert res.status_code == 200
+    order_id = res.get_json()["order_id"]
+    assert client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"}).status_code == 200
+
+    stats = client.get("/api/admin/event-stats").get_json()["order_stream"]
+    assert stats["publish_failures"] == 2
+
+def test_mongo_backend_publishes_in_the_background():
+    from benchmarks.localdb import FakeMongoDB
+    from order_events import MongoEventBackend
+
+    mongo = FakeMongoDB()
+    mongo_up = threading.Event()
+    backend = MongoEventBackend(lambda: mongo_up.wait(5) and mongo)
+
+    start = time.perf_counter()
+    backend.publish({"type": "order_hidden", "data": {"id": 1}})
+    assert time.perf_counter() - start < 0.5
+
+    mongo_up.set()
+    deadline = time.monotonic() + 2
+    while not mongo["order_events"].docs and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [d["data"] for d in mongo["order_events"].docs] == [{"id": 1}]
+
+def test_mongo_backend_makes_the_collection_capped_and_starts_lazily():
+    from benchmarks.localdb import FakeMongoDB
+    from order_events import MongoEventBackend
+
+    mongo = FakeMongoDB()
+    mongo["order_events"].insert_one({"type": "stale", "data": {}})  # created uncapped elsewhere
+    backend = MongoEventBackend(lambda: mongo)
+    b = OrderEventBroadcaster(backend=backend)
+    assert backend._tail_thread is None and backend._publisher is None
+
+    assert backend._collection().options()["capped"] is True
+    b.subscribe()
+    assert backend._tail_thread.is_alive()
@@ -0,0 +1,47 @@
+import csv
+import io
+import json
+
+from benchmarks.localdb import seed_orders
+from order_export import EXPORT_COLUMNS, export_batches
+from pagination import parse_page_args
+from tests.conftest import login_session
+
+def test_export_is_admin_only(client, local_db):
+    login_session(client)
+    assert client.get("/api/admin/orders/export").status_code == 403
+
+def test_ndjson_export_has_one_row_per_line(client, local_db):
+    seed_orders(local_db.engine, orders=30)
+    login_session(client, email="admin@example.com")
+    res = client.get("/api/admin/orders/export?status=completed")
+    assert res.mimetype == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    # seed_orders: order i has 1 + i % 4 lines, status cycles every 3
+    assert len(rows) == sum(1 + i % 4 for i in range(30) if i % 3 == 2)
+    assert {r["status"] for r in rows} == {"completed"}
+    assert set(rows[0]) == set(EXPORT_COLUMNS)
+
+def test_csv_export_with_date_range(client, local_db):
+    seed_orders(local_db.engine, orders=24)
+    login_session(client, email="admin@example.com")
+    res = client.get("/api/admin/orders/export?format=csv&since=2025-03-01&until=2025-05-01")
+    assert res.mimetype == "text/csv"
+
+    reader = csv.reader(io.StringIO(res.get_data(as_text=True)))
+    assert tuple(next(reader)) == EXPORT_COLUMNS
+    months = {row[1][:7] for row in reader}
+    assert months == {"2025-03", "2025-04"}
+
+def test_empty_export_still_has_csv_header(client, local_db):
+    login_session(client, email="admin@example.com")
+    res = client.get("/api/admin/orders/export?format=csv")
+    assert res.get_data(as_text=True).strip() == ",".join(EXPORT_COLUMNS)
+    assert client.get("/api/admin/orders/export?format=xml").status_code == 400
+
+def test_batches_are_bounded(local_db):
+    seed_orders(local_db.engine, orders=50)
+    batches = list(export_batches(local_db.engine, parse_page_args({}), batch_size=16))
+    assert max(len(b) for b in batches) == 16
+    assert sum(len(b) for b in batches) == sum(1 + i % 4 for i in range(50))
@@ -0,0 +1,27 @@
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def test_history_returns_items_and_logs_in_fixed_queries(client, local_db, app_module):
+    login_session(client, user_id=1)
+    for menu_id in (1, 2, 3):
+        client.post("/api/order", json={"items": [{"menu_id": menu_id, "quantity": 2}]})
+    app_module.event_writer.flush()
+
+    counter = RoundTripCounter(local_db.engine)
+    res = client.get("/api/orders/history")
+    assert res.status_code == 200
+    orders = res.get_json()["orders"]
+
+    assert counter.count == 2  # orders + one items join, regardless of order count
+    assert len(orders) == 3
+    for o in orders:
+        assert len(o["items"]) == 1 and o["items"][0]["quantity"] == 2
+        assert o["logs"][0]["message"] == "Order created"
+
+def test_history_only_shows_own_orders(client, local_db):
+    login_session(client, user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+
+    login_session(client, user_id=2)
+    res = client.get("/api/orders/history")
+    assert res.get_json()["orders"] == []
@@ -0,0 +1,54 @@
+from sqlalchemy import text
+
+import order_items
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def _checkout(client):
+    login_session(client, user_id=1)
+    return client.post("/api/order", json={"items": [{"menu_id": 2, "quantity": 3}]}).get_json()["order_id"]
+
+def test_lines_keep_the_price_they_were_sold_at(client, local_db):
+    order_id = _checkout(client)
+    with local_db.engine.begin() as conn:
+        conn.execute(text("UPDATE menu SET price = 99, name = 'Renamed' WHERE id = 2"))
+
+    (item,) = client.get(f"/api/order/{order_id}").get_json()["items"]
+    assert item == {"menu_id": 2, "name": "Item 2", "price": 4.0, "quantity": 3, "line_total": 12.0}
+
+    (order,) = client.get("/api/orders/history").get_json()["orders"]
+    assert order["items"] == [item]
+
+def test_completed_orders_are_served_from_cache(client, local_db, app_module):
+    order_id = _checkout(client)
+    with local_db.engine.begin() as conn:
+        conn.execute(text("UPDATE orders SET status = 'completed' WHERE id = :id"), {"id": order_id})
+
+    first = client.get(f"/api/order/{order_id}").get_json()
+    counter = RoundTripCounter(local_db.engine)
+    assert client.get(f"/api/order/{order_id}").get_json() == first
+    assert counter.count == 0
+
+    login_session(client, email="other@example.com", user_id=2, uid="other")
+    assert client.get(f"/api/order/{order_id}").status_code == 403
+
+def test_backfill_prices_legacy_lines_in_batches(local_db):
+    with local_db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO orders (id, user_id, total) VALUES (1, 1, 0)"))
+        conn.execute(
+            text("INSERT INTO order_items (order_id, menu_id, quantity) VALUES (1, :menu_id, 2)"),
+            [{"menu_id": m} for m in (1, 2, 3, 999)]
+        )
+
+    messages = []
+    assert order_items.backfill(local_db.engine, batch_size=3, log=messages.append) == 3
+    assert len(messages) == 2
+    assert order_items.backfill(local_db.engine) == 0  # nothing left to do
+
+    with local_db.engine.connect() as conn:
+        rows = conn.execute(text(
+            "SELECT menu_id, item_name, unit_price, line_total FROM order_items ORDER BY id"
+        )).fetchall()
+    assert [tuple(r) for r in rows] == [
+        (1, "Item 1", 3.25, 6.5), (2, "Item 2", 4.0, 8.0), (3, "Item 3", 4.75, 9.5), (999, None, None, None),
+    ]
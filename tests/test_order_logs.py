@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from benchmarks.localdb import FakeMongoDB
+from order_logs import LogQueryError, OrderLogs
+from tests.conftest import login_session
+
+def _logs(n, ttl_days=0):
+    mongo = FakeMongoDB()
+    coll = mongo["order_logs"]
+    for i in range(n):
+        coll.insert_one({"order_id": i % 3 + 1, "user_id": i % 2 + 1, "message": f"log {i}"})
+    return OrderLogs(lambda: coll, ttl_days=ttl_days), coll
+
+def test_indexes_created_once_with_optional_ttl():
+    logs, coll = _logs(1, ttl_days=30)
+    logs.for_order(1)
+    logs.page()
+    names = [kwargs["name"] for _, kwargs in coll.indexes]
+    assert names == ["order_id_1", "user_id_1__id_-1", "ts_ttl"]
+    assert coll.indexes[2][1]["expireAfterSeconds"] == 30 * 86400
+
+def test_pages_walk_newest_first_without_gaps():
+    logs, _ = _logs(25)
+    seen, cursor = [], None
+    while True:
+        page, cursor = logs.page(limit=10, cursor=cursor)
+        seen += [doc["message"] for doc in page]
+        assert all("_id" not in doc for doc in page)
+        if cursor is None:
+            break
+    assert seen == [f"log {i}" for i in reversed(range(25))]
+
+def test_time_bounds_and_bad_input():
+    logs, _ = _logs(5)
+    future = datetime.now(timezone.utc) + timedelta(minutes=5)
+    assert logs.page(since=future.isoformat())[0] == []
+    assert len(logs.page(until=future.isoformat())[0]) == 5
+    with pytest.raises(LogQueryError):
+        logs.page(cursor="nope")
+    with pytest.raises(LogQueryError):
+        logs.stream(since="yesterday")
+
+def test_api_logs_scoped_to_user_and_paginated(client, local_db, app_module):
+    login_session(client, user_id=1)
+    for _ in range(3):
+        client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+    login_session(client, user_id=2)
+    client.post("/api/order", json={"items": [{"menu_id": 2, "quantity": 1}]})
+    app_module.event_writer.flush()
+
+    res = client.get("/api/logs?limit=2")
+    assert [log["user_id"] for log in res.get_json()] == [2]
+    assert "X-Next-Cursor" not in res.headers
+
+    login_session(client, email="admin@example.com", user_id=1)
+    res = client.get("/api/logs?limit=2")
+    assert len(res.get_json()) == 2
+    rest = client.get(f"/api/logs?limit=2&cursor={res.headers['X-Next-Cursor']}").get_json()
+    assert len(rest) == 2
+
+    assert client.get("/api/logs?cursor=bad").status_code == 400
+
+def test_admin_export_streams_ndjson(client, local_db, app_module):
+    login_session(client, user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+    app_module.event_writer.flush()
+    assert client.get("/api/admin/logs/export").status_code == 403
+
+    login_session(client, email="admin@example.com", user_id=1)
+    res = client.get("/api/admin/logs/export")
+    assert res.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert [line["message"] for line in lines] == ["Order created"]
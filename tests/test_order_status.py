@@ -0,0 +1,76 @@
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def _orders(client, n):
+    login_session(client, user_id=1)
+    ids = [client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]}).get_json()["order_id"]
+           for _ in range(n)]
+    login_session(client, email="admin@example.com", user_id=1)
+    return ids
+
+def test_transition_is_one_statement(client, local_db):
+    (order_id,) = _orders(client, 1)
+    counter = RoundTripCounter(local_db.engine)
+    res = client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"})
+    assert res.status_code == 200
+    assert counter.count == 1
+
+def test_state_machine_rejects_skips_and_going_back(client, local_db):
+    (order_id,) = _orders(client, 1)
+    res = client.patch(f"/api/order/{order_id}/status", json={"status": "completed"})
+    assert res.status_code == 409 and res.get_json()["status"] == "pending"
+
+    client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"})
+    client.patch(f"/api/order/{order_id}/status", json={"status": "completed"})
+    assert client.patch(f"/api/order/{order_id}/status", json={"status": "pending"}).status_code == 400
+    assert client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"}).status_code == 409
+    # Repeating a transition that already happened is not an error
+    assert client.patch(f"/api/order/{order_id}/status", json={"status": "completed"}).status_code == 200
+    assert client.patch("/api/order/9999/status", json={"status": "confirmed"}).status_code == 404
+
+def test_bulk_transition_reports_each_order(client, local_db, app_module):
+    a, b, c = _orders(client, 3)
+    client.patch(f"/api/order/{c}/status", json={"status": "confirmed"})
+    client.patch(f"/api/order/{c}/status", json={"status": "completed"})
+
+    res = client.post("/api/admin/orders/status", json={"order_ids": [a, b, c, 9999], "status": "confirmed"})
+    data = res.get_json()
+    assert res.status_code == 200
+    assert data["updated"] == [a, b]
+    assert data["conflicts"] == [{"id": c, "status": "completed"}]
+    assert data["not_found"] == [9999]
+
+    app_module.sales_rollups.flush()
+    res = client.get("/api/admin/analytics")
+    assert res.get_json()["orders_by_status"] == {"pending": 0, "confirmed": 2, "completed": 1}
+
+def test_bulk_transition_only_announces_orders_it_moved(client, local_db, app_module, monkeypatch):
+    a, b = _orders(client, 2)
+    client.patch(f"/api/order/{a}/status", json={"status": "confirmed"})
+    published = []
+    monkeypatch.setattr(app_module.order_broadcaster, "publish", lambda event, data: published.append(data["id"]))
+
+    res = client.post("/api/admin/orders/status", json={"order_ids": [a, b], "status": "confirmed"})
+    assert res.get_json()["updated"] == [a, b]
+    assert published == [b]
+
+    app_module.event_writer.flush()
+    logs = list(local_db.mongo["order_logs"].find({"message": "Admin set status to confirmed"}))
+    assert sorted(log["order_id"] for log in logs) == [a, b]  # a's comes from the earlier PATCH
+
+def test_bulk_transition_validation(client, local_db):
+    _orders(client, 1)
+    assert client.post("/api/admin/orders/status", json={"order_ids": [], "status": "confirmed"}).status_code == 400
+    assert client.post("/api/admin/orders/status", json={"order_ids": ["1"], "status": "confirmed"}).status_code == 400
+    assert client.post("/api/admin/orders/status", json={"order_ids": [1], "status": "nope"}).status_code == 400
+
+def test_hide_only_completed_orders(client, local_db):
+    (order_id,) = _orders(client, 1)
+    assert client.patch(f"/api/order/{order_id}/hide").status_code == 400
+    assert client.patch("/api/order/9999/hide").status_code == 404
+
+    client.patch(f"/api/order/{order_id}/status", json={"status": "confirmed"})
+    client.patch(f"/api/order/{order_id}/status", json={"status": "completed"})
+    counter = RoundTripCounter(local_db.engine)
+    assert client.patch(f"/api/order/{order_id}/hide").status_code == 200
+    assert counter.count == 1
@@ -0,0 +1,85 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from outbound import CircuitOpenError, OutboundClient
+from tests.conftest import login_session
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.server.hits += 1
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = b'{"ok": true}'
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.hits = 0
+    server.status = 200
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_port}/audit"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_connections_are_reused(stub):
+    client = OutboundClient()
+    for _ in range(10):
+        assert client.post(stub.url, json={"n": 1}).json() == {"ok": True}
+
+    host = client.stats()["hosts"][f"127.0.0.1:{stub.server_port}"]
+    assert host["requests"] == 10 and host["connections_opened"] == 1
+    assert host["reuse_ratio"] == 0.9
+    assert host["latency"]["count"] == 10
+
+def test_circuit_opens_fails_fast_then_recovers(stub):
+    client = OutboundClient(failure_threshold=3, reset_timeout=0.2)
+    stub.status = 503
+    for _ in range(3):
+        assert client.post(stub.url).status_code == 503
+    assert client.stats()["open_circuits"] == 1
+
+    with pytest.raises(CircuitOpenError):
+        client.post(stub.url)
+    assert stub.hits == 3  # rejected without touching the upstream
+
+    stub.status = 200
+    time.sleep(0.25)
+    assert client.post(stub.url).status_code == 200  # half-open trial
+    stats = client.stats()
+    assert stats["open_circuits"] == 0
+    assert stats["hosts"][f"127.0.0.1:{stub.server_port}"]["rejected"] == 1
+
+def test_connection_errors_count_towards_the_breaker():
+    client = OutboundClient(retries=0, failure_threshold=2, timeout=0.5)
+    url = "http://127.0.0.1:9/unreachable"
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            client.post(url)
+    with pytest.raises(CircuitOpenError):
+        client.post(url)
+
+def test_open_translate_circuit_is_a_502(client, monkeypatch, app_module):
+    login_session(client)
+    monkeypatch.setattr(app_module, "get_translate_key", lambda: "fake-key")
+
+    def open_circuit(*args, **kwargs):
+        raise CircuitOpenError("Circuit open")
+    monkeypatch.setattr(app_module.outbound, "request", open_circuit)
+
+    res = client.post("/api/translate", json={"text": "hello", "target": "es"})
+    assert res.status_code == 502
+    assert "unavailable" in res.get_json()["error"]
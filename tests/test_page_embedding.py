@@ -0,0 +1,49 @@
+import json
+import re
+
+from benchmarks.localdb import RoundTripCounter
+from tests.conftest import login_session
+
+def _embedded(res, element_id):
+    html = res.get_data(as_text=True)
+    match = re.search(rf'<script id="{element_id}" type="application/json">(.*?)</script>', html, re.S)
+    return json.loads(match.group(1))
+
+def test_menu_page_embeds_what_the_api_returns(client, local_db):
+    login_session(client)
+    res = client.get("/menu")
+    assert res.status_code == 200
+    assert _embedded(res, "initialMenu") == client.get("/api/menu").get_json()
+
+def test_orders_page_embeds_first_history_page(client, local_db):
+    login_session(client)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 2}]})
+
+    counter = RoundTripCounter(local_db.engine)
+    page = _embedded(client.get("/orders"), "initialOrders")
+    assert counter.count == 2  # same queries as /api/orders/history
+    assert page == client.get("/api/orders/history").get_json()
+    assert page["orders"][0]["items"][0]["quantity"] == 2
+
+def test_admin_page_embeds_orders_and_stream_position(client, local_db, app_module):
+    login_session(client, user_id=1)
+    client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 1}]})
+    login_session(client, email="admin@example.com")
+
+    res = client.get("/admin/orders")
+    assert _embedded(res, "initialOrders") == client.get("/api/admin/orders").get_json()
+    assert f'listen({json.dumps(app_module.order_broadcaster.last_event_id())})' in res.get_data(as_text=True)
+
+def test_page_falls_back_to_fetching_when_the_query_fails(client, local_db, monkeypatch, app_module):
+    login_session(client)
+    monkeypatch.setattr(app_module, "_order_history", lambda *a: 1 / 0)
+    res = client.get("/orders")
+    assert res.status_code == 200
+    assert _embedded(res, "initialOrders") is None
+
+def test_embedded_json_cannot_close_the_script_tag(client, local_db):
+    login_session(client, email="admin@example.com")
+    client.post("/api/menu", json={"name": "</script><b>x", "price": 3})
+    html = client.get("/menu").get_data(as_text=True)
+    assert "</script><b>" not in html
+    assert any(i["name"] == "</script><b>x" for i in _embedded(client.get("/menu"), "initialMenu")["menu"])
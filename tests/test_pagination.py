@@ -0,0 +1,54 @@
+from sqlalchemy import text
+
+from tests.conftest import login_session
+
+def _seed_orders(engine, n=7):
+    # Two orders share a timestamp to exercise the id tie-break
+    with engine.begin() as conn:
+        conn.execute(
+            text("""
+                INSERT INTO orders (user_id, total, status, created_at)
+                VALUES (:user_id, 10, :status, :created_at)
+            """),
+            [{"user_id": 1,
+              "status": "completed" if i % 2 else "pending",
+              "created_at": f"2026-01-{min(i, 5) + 1:02d} 12:00:00"}
+             for i in range(n)]
+        )
+
+def test_my_orders_keyset_pages_cover_everything_once(client, local_db):
+    _seed_orders(local_db.engine)
+    login_session(client, user_id=1)
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/orders?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        data = client.get(url).get_json()
+        assert len(data["orders"]) <= 2
+        seen += [o["id"] for o in data["orders"]]
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(seen) == 7 and len(set(seen)) == 7
+    assert seen[:2] == [7, 6]  # same created_at, newest id first
+
+def test_admin_orders_status_and_date_filters(client, local_db):
+    _seed_orders(local_db.engine)
+    login_session(client, email="admin@example.com")
+
+    data = client.get("/api/admin/orders?status=completed").get_json()
+    assert data["orders"] and all(o["status"] == "completed" for o in data["orders"])
+
+    data = client.get("/api/admin/orders?since=2026-01-03&until=2026-01-05").get_json()
+    assert sorted(o["id"] for o in data["orders"]) == [3, 4]
+
+def test_invalid_page_args_400(client, local_db):
+    login_session(client, email="admin@example.com")
+    assert client.get("/api/admin/orders?status=hacked").status_code == 400
+    assert client.get("/api/orders?cursor=garbage").status_code == 400
+
+def test_migration_adds_listing_indexes(local_db):
+    with local_db.engine.connect() as conn:
+        names = {r[0] for r in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert {"idx_orders_user_created", "idx_orders_hidden_created"} <= names
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, text
+
+from tests.conftest import login_session
+
+def test_pool_stats_admin_only(client):
+    login_session(client, email="user@example.com")
+    res = client.get("/api/admin/pool-stats")
+    assert res.status_code == 403
+
+def test_pool_stats_reports_mysql_and_mongo(client):
+    login_session(client, email="admin@example.com")
+    res = client.get("/api/admin/pool-stats")
+    assert res.status_code == 200
+    pools = res.get_json()["pools"]
+    assert {"pool_size", "checked_out", "overflow", "checkout_wait"} <= set(pools["mysql"])
+    assert {"open_connections", "checked_out", "checkout_wait"} <= set(pools["mongo"])
+
+def test_timed_pool_records_checkout_wait(app_module):
+    import db
+
+    engine = create_engine("sqlite://", poolclass=db.TimedQueuePool, pool_size=1)
+    other = create_engine("sqlite://", poolclass=db.TimedQueuePool, pool_size=1)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert engine.pool.stats.checkout_wait.snapshot()["count"] == 1
+    assert other.pool.stats.checkout_wait.snapshot()["count"] == 0
+
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert engine.pool.stats.checkout_wait.snapshot()["count"] == 2
+
+def test_pool_stats_reports_the_replica_pool(client, app_module, monkeypatch):
+    import db
+
+    assert "mysql_replica" not in db.pool_stats()
+    replica = create_engine("sqlite://", poolclass=db.TimedQueuePool, pool_size=1, max_overflow=3)
+    monkeypatch.setattr(db, "mysql_read_engine", replica)
+    with replica.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    login_session(client, email="admin@example.com")
+    pools = client.get("/api/admin/pool-stats").get_json()["pools"]
+    assert pools["mysql_replica"]["checkout_wait"]["count"] == 1
+    assert (pools["mysql_replica"]["pool_size"], pools["mysql_replica"]["max_overflow"]) == (1, 3)
+    assert pools["mysql"]["checkout_wait"]["count"] == 0
+
+def test_pool_stats_log_line_is_emitted(app_module, caplog):
+    # Uses the app logger's own level, as under gunicorn
+    import db
+
+    db.log_pool_stats(app_module.app.logger)
+    assert [r.levelname for r in caplog.records if r.getMessage().startswith("pool_stats ")] == ["INFO"]
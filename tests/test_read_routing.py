@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine
+
+from benchmarks.localdb import make_engine, seed
+from tests.conftest import login_session
+
+@pytest.fixture
+def replica(app_module, local_db, monkeypatch):
+    # A second database standing in for the read replica; it never receives
+    # the writes made through the app, i.e. it is infinitely behind
+    engine = make_engine()
+    seed(engine)
+    monkeypatch.setattr(app_module, "mysql_read_engine", engine)
+    app_module.db_router.check_interval = 0
+    return engine
+
+def _order(client):
+    return client.post("/api/order", json={"items": [{"menu_id": 1, "quantity": 2}]}).get_json()["order_id"]
+
+def _my_order_ids(client):
+    return [o["id"] for o in client.get("/api/orders").get_json()["orders"]]
+
+def test_reads_stick_to_the_primary_after_a_write(client, replica, app_module, monkeypatch):
+    login_session(client)
+    assert _my_order_ids(client) == []  # from the replica
+    order_id = _order(client)
+
+    assert _my_order_ids(client) == [order_id]
+    assert client.get(f"/api/order/{order_id}").status_code == 200
+    assert app_module.db_router.counts["primary_sticky"] == 2
+
+    monkeypatch.setattr(app_module, "READ_YOUR_WRITES_SECONDS", 0)
+    assert _my_order_ids(client) == []  # window over, back on the stale replica
+    assert app_module.db_router.counts["replica"] == 2
+
+def test_lagging_replica_falls_back_to_primary(client, replica, app_module, monkeypatch):
+    login_session(client)
+    order_id = _order(client)
+    monkeypatch.setattr(app_module, "READ_YOUR_WRITES_SECONDS", 0)
+
+    app_module.db_router.lag_check = lambda conn: 60
+    assert _my_order_ids(client) == [order_id]
+    app_module.db_router.lag_check = lambda conn: 1
+    assert _my_order_ids(client) == []
+
+    stats = app_module.db_router.stats()
+    assert stats["primary_lagging"] == 1 and stats["replica"] == 1
+    assert stats["replica_lag_seconds"] == 1
+
+def test_unavailable_replica_is_skipped_until_retry(app_module, tmp_path):
+    primary = make_engine()
+    seed(primary)
+    missing = create_engine(f"sqlite:///{tmp_path}/absent/replica.db")  # directory doesn't exist
+    router = app_module.db.ReadRouter(lambda: primary, lambda: missing, check_interval=0, retry_after=60)
+
+    for _ in range(3):
+        with router.connect() as conn:
+            assert conn.exec_driver_sql("SELECT COUNT(*) FROM menu").scalar() > 0
+
+    stats = router.stats()
+    assert stats["replica_down"] and stats["primary_down"] == 3 and stats["replica"] == 0
+
+def test_without_a_replica_everything_reads_the_primary(client, local_db, app_module):
+    login_session(client)
+    order_id = _order(client)
+    assert client.get(f"/api/order/{order_id}").status_code == 200
+    assert app_module.db_router.stats()["replica_configured"] is False
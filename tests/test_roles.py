@@ -0,0 +1,83 @@
+from sqlalchemy import text
+
+from benchmarks.localdb import RoundTripCounter
+from roles import RoleResolver, upsert_user
+from tests.conftest import login_session
+
+def test_admin_set_parsed_once_per_value(monkeypatch):
+    monkeypatch.setenv("ADMIN_EMAIL", " A@x.com , b@x.com,")
+    r = RoleResolver()
+    first = r.admin_emails()
+    assert first == {"a@x.com", "b@x.com"}
+    assert r.admin_emails() is first
+    assert r.role_for("B@X.com") == "admin" and r.role_for("c@x.com") == "user"
+
+    v = r.version()
+    assert r.version() is v  # cached, not rehashed per call
+    monkeypatch.setenv("ADMIN_EMAIL", "c@x.com")
+    assert r.version() != v
+    assert r.role_for("c@x.com") == "admin"
+
+def test_roles_table_lookup_is_cached(local_db, monkeypatch):
+    monkeypatch.setenv("ADMIN_EMAIL", "")
+    with local_db.engine.begin() as conn:
+        conn.execute(text("INSERT INTO roles (email, role) VALUES ('chef@x.com', 'admin')"))
+
+    r = RoleResolver(lambda: local_db.engine, use_table=True)
+    counter = RoundTripCounter(local_db.engine)
+    assert r.role_for("chef@x.com") == "admin"
+    assert r.role_for("chef@x.com") == "admin"
+    assert counter.count == 1
+
+def test_upsert_user_is_one_statement_and_stable(local_db):
+    counter = RoundTripCounter(local_db.engine)
+    with local_db.engine.begin() as conn:
+        new_id = upsert_user(conn, "new@example.com", "New")
+    with local_db.engine.begin() as conn:
+        again = upsert_user(conn, "new@example.com", "New")
+        existing = upsert_user(conn, "user1@example.com", "User 1")
+
+    assert new_id == again
+    assert existing == 1
+    assert counter.count == 3
+
+def test_login_stores_role_in_session(client, local_db, app_module, monkeypatch):
+    monkeypatch.setenv("FIREBASE_VERIFY_MODE", "sdk")
+    monkeypatch.setattr(app_module.fb_auth, "verify_id_token",
+                        lambda t: {"uid": "u1", "email": "admin@example.com", "name": "Admin"},
+                        raising=False)
+    res = client.post("/sessionLogin", json={"idToken": "t"})
+    assert res.get_json()["success"] is True
+
+    with client.session_transaction() as sess:
+        assert sess["role"] == "admin"
+        assert sess["user_id"]
+
+def test_stale_session_role_is_refreshed(client, app_module, monkeypatch):
+    login_session(client, email="admin@example.com")
+    with client.session_transaction() as sess:
+        sess["role"] = "admin"
+        sess["role_v"] = "outdated"
+    monkeypatch.setenv("ADMIN_EMAIL", "someone-else@example.com")
+
+    res = client.post("/api/menu", json={"name": "Pizza", "price": 10})
+    assert res.status_code == 403
+
+def test_email_unique_key_comes_from_a_migration():
+    # Production's users table isn't created by this repo; the upsert must not
+    # depend on the stand-in schema declaring email UNIQUE
+    import os
+
+    from sqlalchemy import create_engine
+
+    from migrate import MIGRATIONS_DIR, _statements
+
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT NOT NULL, name TEXT)"))
+        with open(os.path.join(MIGRATIONS_DIR, "006_users_email_unique.sql")) as f:
+            for stmt in _statements(f.read()):
+                conn.execute(text(stmt))
+        first = upsert_user(conn, "a@example.com", "A")
+        assert upsert_user(conn, "a@example.com", "A") == first
+        assert conn.execute(text("SELECT COUNT(*) FROM users")).scalar() == 1
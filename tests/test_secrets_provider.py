@@ -0,0 +1,81 @@
+import sys
+import threading
+import time
+import types
+
+import startup
+from secrets_provider import SecretsProvider
+
+def _install_fake_client(monkeypatch, delay=0.0):
+    created = []
+    calls = []
+
+    class Payload:
+        def __init__(self, s):
+            self.data = s.encode("utf-8")
+
+    class Resp:
+        def __init__(self, s):
+            self.payload = Payload(s)
+
+    class Client:
+        def __init__(self):
+            created.append(self)
+
+        def access_secret_version(self, request):
+            calls.append((request["name"], threading.get_ident()))
+            time.sleep(delay)
+            return Resp(request["name"].split("/")[3] + "-value")
+
+    mod = types.ModuleType("google.cloud.secretmanager")
+    mod.SecretManagerServiceClient = Client
+    monkeypatch.setitem(sys.modules, "google", types.ModuleType("google"))
+    monkeypatch.setitem(sys.modules, "google.cloud", types.ModuleType("google.cloud"))
+    monkeypatch.setitem(sys.modules, "google.cloud.secretmanager", mod)
+    return created, calls
+
+def test_prefetch_is_concurrent_and_uses_one_client(monkeypatch):
+    created, calls = _install_fake_client(monkeypatch, delay=0.2)
+    provider = SecretsProvider("p")
+
+    start = time.perf_counter()
+    provider.prefetch(["A", "B", "C", "D", "E"])
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.6  # five 0.2s calls overlapped, not 1s serial
+    assert len(created) == 1
+    assert provider.get("C") == "C-value"
+    assert len(calls) == 5  # get() served from cache
+    assert "secret.C" in startup.report()
+
+def test_ttl_expiry_refetches(monkeypatch):
+    _, calls = _install_fake_client(monkeypatch)
+    provider = SecretsProvider("p", ttl=0)
+    provider.get("TTL_TEST")
+    provider.get("TTL_TEST")
+    assert len(calls) == 2
+    # Request-time fetches and refreshes don't overwrite the cold-start timings
+    assert "secret.TTL_TEST" not in startup.report()
+
+def test_firebase_initialised_lazily_on_first_login(app_module, client, monkeypatch):
+    monkeypatch.setenv("FIREBASE_VERIFY_MODE", "sdk")
+    inits = []
+    monkeypatch.setattr(app_module.firebase_admin, "_apps", [], raising=False)
+    monkeypatch.setattr(app_module.firebase_admin, "initialize_app",
+                        lambda cred: inits.append(cred) or app_module.firebase_admin._apps.append(cred),
+                        raising=False)
+    monkeypatch.setattr(app_module.credentials, "Certificate", lambda d: d, raising=False)
+    monkeypatch.setattr(app_module, "get_secret", lambda name: '{"project_id": "x"}')
+    monkeypatch.setattr(app_module.fb_auth, "verify_id_token",
+                        lambda token: (_ for _ in ()).throw(ValueError("bad token")), raising=False)
+
+    assert inits == []  # importing main did not touch Firebase
+    client.post("/sessionLogin", json={"idToken": "t"})
+    client.post("/sessionLogin", json={"idToken": "t"})
+    assert inits == [{"project_id": "x"}]
+
+def test_startup_timings_are_logged(caplog, app_module):
+    # app_module reloads main, which logs its import breakdown once at the end
+    (record,) = [r for r in caplog.get_records("setup") if r.getMessage().startswith("startup timings ")]
+    assert record.levelname == "INFO"
+    assert "main.import" in record.getMessage()
@@ -0,0 +1,119 @@
+import json
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from token_verifier import CachedTokenVerifier, InvalidTokenError, SigningKeys, verify_firebase_token
+
+PROJECT = "firebase-project"
+
+# Local stand-in for Google's signing key
+PRIVATE_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+def make_token(kid="k1", key=PRIVATE_KEY, **overrides):
+    now = int(time.time())
+    claims = {"aud": PROJECT, "iss": f"https://securetoken.google.com/{PROJECT}",
+              "sub": "uid-1", "email": "user@example.com", "iat": now, "exp": now + 3600}
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm="RS256", headers={"kid": kid})
+
+KEYS = {"k1": PRIVATE_KEY.public_key()}
+
+def test_valid_token_verifies_locally():
+    claims = verify_firebase_token(make_token(), KEYS, PROJECT)
+    assert claims["uid"] == "uid-1" and claims["email"] == "user@example.com"
+
+@pytest.mark.parametrize("token", [
+    make_token(kid="other"),
+    make_token(aud="someone-else"),
+    make_token(exp=int(time.time()) - 60),
+    make_token(key=rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+    make_token(iss="https://securetoken.google.com/someone-else"),
+    make_token(sub=""),
+    "not-a-token",
+])
+def test_bad_tokens_rejected(token):
+    with pytest.raises(InvalidTokenError):
+        verify_firebase_token(token, KEYS, PROJECT)
+
+def test_signing_keys_cached_for_max_age():
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return KEYS, 3600
+
+    keys = SigningKeys(fetch=fetch)
+    keys.get()
+    keys.get()
+    assert len(fetches) == 1 and keys.refreshes == 1
+
+def test_stale_keys_served_when_refresh_fails():
+    responses = [(KEYS, 0)]
+
+    def fetch():
+        if not responses:
+            raise ConnectionError("google down")
+        return responses.pop()
+
+    keys = SigningKeys(fetch=fetch, retry_after=60)
+    assert keys.get() == KEYS  # expires immediately
+    assert keys.get() == KEYS  # refresh fails, cached keys still used
+    assert keys.get() == KEYS  # within retry_after: no new fetch
+    assert keys.refresh_failures == 1
+
+    empty = SigningKeys(fetch=fetch)
+    with pytest.raises(ConnectionError):
+        empty.get()
+
+def test_verified_claims_cached_by_token_hash():
+    calls = []
+    verifier = CachedTokenVerifier(lambda t: calls.append(t) or verify_firebase_token(t, KEYS, PROJECT))
+    token = make_token()
+    verifier.verify(token)
+    verifier.verify(token)
+    assert len(calls) == 1
+    assert verifier.stats()["cache_hits"] == 1 and verifier.stats()["latency"]["count"] == 1
+
+def test_session_login_uses_local_verification(client, local_db, app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "FIREBASE_PROJECT_ID", PROJECT)
+    monkeypatch.setattr(app_module.signing_keys, "_fetch", lambda: (KEYS, 3600))
+
+    res = client.post("/sessionLogin", json={"idToken": make_token()})
+    assert res.get_json()["success"] is True
+
+    res = client.post("/sessionLogin", json={"idToken": make_token(aud="nope")})
+    assert res.status_code == 401
+
+def test_tokens_are_checked_against_the_firebase_project(client, local_db, app_module, monkeypatch):
+    # App Engine project (GOOGLE_CLOUD_PROJECT) and Firebase project differ
+    monkeypatch.setattr(app_module, "FIREBASE_PROJECT_ID", None)
+    monkeypatch.setattr(app_module, "get_secret", lambda name: json.dumps({"project_id": PROJECT}))
+    monkeypatch.setattr(app_module.signing_keys, "_fetch", lambda: (KEYS, 3600))
+    assert app_module.os.environ["GOOGLE_CLOUD_PROJECT"] != PROJECT
+
+    res = client.post("/sessionLogin", json={"idToken": make_token()})
+    assert res.get_json()["success"] is True
+
+    gcp = app_module.os.environ["GOOGLE_CLOUD_PROJECT"]
+    res = client.post("/sessionLogin", json={"idToken": make_token(aud=gcp, iss=f"https://securetoken.google.com/{gcp}")})
+    assert res.status_code == 401
+
+def test_jwks_keys_verify_tokens(monkeypatch):
+    import token_verifier
+
+    jwk = dict(json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(PRIVATE_KEY.public_key())), kid="k1", alg="RS256")
+
+    class Response:
+        headers = {"Cache-Control": "public, max-age=19000"}
+        def raise_for_status(self):
+            pass
+        def json(self):
+            return {"keys": [jwk]}
+
+    monkeypatch.setattr(token_verifier.requests, "get", lambda url, timeout: Response())
+    keys, max_age = token_verifier.fetch_google_jwks()
+    assert max_age == 19000
+    assert verify_firebase_token(make_token(), keys, PROJECT)["uid"] == "uid-1"
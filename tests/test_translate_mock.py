@@ -8,7 +8,7 @@ def test_translate_success_mocked(client, monkeypatch, app_module):
         def json(self):
             return {"data": {"translations": [{"translatedText": "hola"}]}}
 
-    monkeypatch.setattr(app_module.requests, "post", lambda *a, **k: FakeResp())
+    monkeypatch.setattr(app_module.outbound, "post", lambda *a, **k: FakeResp())
     monkeypatch.setattr(app_module, "get_translate_key", lambda: "fake-key")
 
     res = client.post("/api/translate", json={"text": "hello", "target": "es"})
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.localdb import FakeCollection
+from translation import TranslationError, TranslationService
+from tests.conftest import login_session
+
+class FakeUpstream:
+    # Stands in for the Translation API: upper-cases every q string
+    def __init__(self, status_code=200, delay=None):
+        self.calls = []
+        self.status_code = status_code
+        self.delay = delay
+
+    def __call__(self, url, json=None, timeout=None):
+        self.calls.append(json)
+        if self.delay:
+            self.delay.wait(5)
+        upstream = self
+
+        class Resp:
+            status_code = upstream.status_code
+            text = "quota exceeded"
+
+            def json(self):
+                return {"data": {"translations": [{"translatedText": q.upper()} for q in json["q"]]}}
+
+        return Resp()
+
+def test_batch_uses_one_upstream_call_and_caches():
+    upstream = FakeUpstream()
+    keys = []
+    svc = TranslationService(lambda: keys.append(1) or "k", upstream)
+
+    assert svc.translate_many(["a", "b", "a"], "es") == ["A", "B", "A"]
+    assert upstream.calls == [{"q": ["a", "b"], "target": "es"}]
+
+    assert svc.translate("b", "es") == "B"
+    assert len(upstream.calls) == 1  # served from cache
+    assert svc.translate("b", "fr") == "B"
+    assert len(upstream.calls) == 2  # different target is a different key
+    assert len(keys) == 1  # secret fetched once
+
+def test_persistent_store_survives_new_service():
+    coll = FakeCollection()
+    svc = TranslationService(lambda: "k", FakeUpstream(), store=lambda: coll)
+    svc.translate("menu", "es")
+
+    upstream = FakeUpstream()
+    fresh = TranslationService(lambda: "k", upstream, store=lambda: coll)
+    assert fresh.translate("menu", "es") == "MENU"
+    assert upstream.calls == []
+
+def test_identical_in_flight_requests_are_coalesced():
+    release = threading.Event()
+    upstream = FakeUpstream(delay=release)
+    svc = TranslationService(lambda: "k", upstream)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(svc.translate("hi", "es"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while svc.stats["coalesced"] + svc.stats["misses"] < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == ["HI"] * 4
+    assert len(upstream.calls) == 1
+
+def test_upstream_error_raises():
+    svc = TranslationService(lambda: "k", FakeUpstream(status_code=403))
+    with pytest.raises(TranslationError):
+        svc.translate("hi", "es")
+
+def test_batch_endpoint(client, monkeypatch, app_module):
+    login_session(client)
+    upstream = FakeUpstream()
+    monkeypatch.setattr(app_module.outbound, "post", upstream)
+
+    res = client.post("/api/translate/batch", json={"texts": ["soup", "bread"], "target": "fr"})
+    assert res.status_code == 200
+    assert res.get_json()["translations"] == ["SOUP", "BREAD"]
+    assert len(upstream.calls) == 1
+
+    assert client.post("/api/translate/batch", json={"texts": []}).status_code == 400
@@ -0,0 +1,169 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import jwt
+import requests
+
+from metrics import Histogram
+
+# Firebase ID tokens are signed by these keys (JWK form of the x509 cert list)
+FIREBASE_JWKS_URL = "https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com"
+
+
+class InvalidTokenError(ValueError):
+    pass
+
+
+def fetch_google_jwks(url: str = FIREBASE_JWKS_URL, timeout: float = 5.0):
+    # -> ({kid: public key}, max_age_seconds)
+    r = requests.get(url, timeout=timeout)
+    r.raise_for_status()
+    keys = {k["kid"]: jwt.PyJWK(k, algorithm="RS256").key for k in r.json()["keys"]}
+    match = re.search(r"max-age=(\d+)", r.headers.get("Cache-Control", ""))
+    return keys, int(match.group(1)) if match else 3600
+
+
+class SigningKeys:
+    # Google's signing keys, cached for the Cache-Control max-age and refreshed
+    # in the background shortly before they expire, so logins never wait on a
+    # certificate fetch after the first one.
+    def __init__(self, fetch=fetch_google_jwks, refresh_margin: float = 300.0, retry_after: float = 30.0,
+                 logger=None):
+        self._fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self._logger = logger
+        self._keys = {}
+        self._expires = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def get(self) -> dict:
+        if not self._keys or time.monotonic() >= self._expires:
+            with self._lock:
+                if not self._keys or time.monotonic() >= self._expires:
+                    try:
+                        self.refresh()
+                    except Exception:
+                        # Keys rotate slowly: past max-age the cached ones are
+                        # almost always still valid, so keep logins working and
+                        # try Google again after retry_after
+                        if not self._keys:
+                            raise
+                        if self._logger:
+                            self._logger.warning("Signing key refresh failed; using cached keys", exc_info=True)
+                        self._expires = time.monotonic() + self.retry_after
+        self.start()
+        return self._keys
+
+    def refresh(self):
+        try:
+            keys, max_age = self._fetch()
+        except Exception:
+            self.refresh_failures += 1
+            raise
+        self._keys = keys
+        self._expires = time.monotonic() + max_age
+        self.refreshes += 1
+
+    def start(self):
+        # Background refresher; safe to call repeatedly
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="signing-keys", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            wait = self._expires - self.refresh_margin - time.monotonic()
+            time.sleep(max(wait, 5.0))
+            try:
+                with self._lock:
+                    self.refresh()
+            except Exception:
+                if self._logger:
+                    self._logger.exception("Signing key refresh failed")
+                time.sleep(30)
+
+
+def verify_firebase_token(token: str, keys: dict, project_id: str, leeway: int = 5) -> dict:
+    # Same checks firebase_admin.auth.verify_id_token makes (minus revocation);
+    # PyJWT does the signature, exp/iat, aud and iss checks
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.PyJWTError:
+        raise InvalidTokenError("Malformed ID token")
+
+    if header.get("alg") != "RS256":
+        raise InvalidTokenError("ID token must be RS256")
+    key = keys.get(header.get("kid"))
+    if key is None:
+        raise InvalidTokenError("ID token signed with an unknown key")
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=project_id,
+            issuer=f"https://securetoken.google.com/{project_id}",
+            leeway=leeway,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise InvalidTokenError(f"Invalid ID token: {e}")
+
+    if not claims["sub"] or not isinstance(claims["sub"], str):
+        raise InvalidTokenError("ID token has no subject")
+
+    claims["uid"] = claims["sub"]
+    return claims
+
+
+class CachedTokenVerifier:
+    # Wraps a verify function with a short-lived cache of verified claims keyed
+    # by the token's hash, plus latency/outcome metrics
+    def __init__(self, verify, ttl: float = 60.0, max_size: int = 10000):
+        self._verify = verify
+        self.ttl = ttl
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.latency = Histogram()
+        self.counts = {"cache_hits": 0, "verified": 0, "failed": 0}
+
+    def verify(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > now:
+                self.counts["cache_hits"] += 1
+                return dict(entry[0])
+
+        start = time.perf_counter()
+        try:
+            claims = self._verify(token)
+        except Exception:
+            with self._lock:
+                self.counts["failed"] += 1
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - start)
+
+        # Never cache past the token's own expiry
+        expires = min(now + self.ttl, float(claims.get("exp", now + self.ttl)))
+        with self._lock:
+            self.counts["verified"] += 1
+            self._cache[key] = (dict(claims), expires)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return claims
+
+    def stats(self) -> dict:
+        return dict(self.counts, latency=self.latency.snapshot())
@@ -0,0 +1,181 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+TRANSLATE_URL = "https://translation.googleapis.com/language/translate/v2"
+
+# The v2 API accepts at most 128 strings per request
+MAX_STRINGS_PER_CALL = 128
+
+
+class TranslationError(Exception):
+    pass
+
+
+class LRUTTLCache:
+    def __init__(self, max_size: int = 2048, ttl: float = 86400.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TranslationService:
+    # Cached, batched front for the Translation API. Lookups go memory cache ->
+    # optional Mongo store -> one upstream call for everything still missing.
+    # Identical strings already being fetched by another request are waited on
+    # rather than fetched twice.
+    def __init__(self, get_key, post, cache: LRUTTLCache = None, store=None,
+                 key_ttl: float = 3600.0, timeout: float = 10.0):
+        self._get_key = get_key
+        self._post = post
+        self.cache = cache or LRUTTLCache()
+        self._store = store  # callable returning a Mongo collection, or None
+        self._key_ttl = key_ttl
+        self._key = None
+        self._key_expires = 0.0
+        self._timeout = timeout
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "store_hits": 0, "misses": 0, "coalesced": 0, "upstream_calls": 0}
+
+    def translate(self, text: str, target: str) -> str:
+        return self.translate_many([text], target)[0]
+
+    def translate_many(self, texts, target: str):
+        keys = [(t, target) for t in texts]
+        results = {}
+
+        for key in dict.fromkeys(keys):
+            value = self.cache.get(key)
+            if value is not None:
+                results[key] = value
+                self.stats["hits"] += 1
+
+        missing = [k for k in dict.fromkeys(keys) if k not in results]
+        if missing and self._store is not None:
+            for key, value in self._store_lookup(missing).items():
+                results[key] = value
+                self.cache.set(key, value)
+                self.stats["store_hits"] += 1
+            missing = [k for k in missing if k not in results]
+
+        owned, waiting = [], []
+        with self._lock:
+            for key in missing:
+                flight = self._inflight.get(key)
+                if flight is None:
+                    flight = self._inflight[key] = _InFlight()
+                    owned.append((key, flight))
+                else:
+                    waiting.append((key, flight))
+
+        if owned:
+            self.stats["misses"] += len(owned)
+            try:
+                translated = self._fetch([key[0] for key, _ in owned], target)
+                fresh = {}
+                for (key, flight), value in zip(owned, translated):
+                    flight.value = results[key] = fresh[key] = value
+                    self.cache.set(key, value)
+                if self._store is not None:
+                    self._store_save(fresh)
+            except Exception as e:
+                for _, flight in owned:
+                    flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key, flight in owned:
+                        self._inflight.pop(key, None)
+                        flight.done.set()
+
+        for key, flight in waiting:
+            self.stats["coalesced"] += 1
+            if not flight.done.wait(self._timeout):
+                raise TranslationError("Timed out waiting for translation")
+            if flight.error is not None:
+                raise flight.error
+            results[key] = flight.value
+
+        return [results[k] for k in keys]
+
+    def _api_key(self) -> str:
+        # The key is a secret lookup; fetch it once per key_ttl, not per request
+        if self._key is None or time.monotonic() > self._key_expires:
+            self._key = self._get_key()
+            self._key_expires = time.monotonic() + self._key_ttl
+        return self._key
+
+    def _fetch(self, texts, target):
+        out = []
+        for i in range(0, len(texts), MAX_STRINGS_PER_CALL):
+            chunk = texts[i:i + MAX_STRINGS_PER_CALL]
+            self.stats["upstream_calls"] += 1
+            r = self._post(
+                f"{TRANSLATE_URL}?key={self._api_key()}",
+                json={"q": chunk, "target": target},
+                timeout=self._timeout,
+            )
+            if r.status_code != 200:
+                raise TranslationError(r.text)
+            translations = r.json()["data"]["translations"]
+            if len(translations) != len(chunk):
+                raise TranslationError("Translation API returned the wrong number of results")
+            out.extend(t["translatedText"] for t in translations)
+        return out
+
+    @staticmethod
+    def _store_id(key) -> str:
+        text, target = key
+        return hashlib.sha1(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+    def _store_lookup(self, keys):
+        ids = {self._store_id(k): k for k in keys}
+        try:
+            docs = self._store().find({"_id": {"$in": list(ids)}}, {"translated": 1})
+            return {ids[d["_id"]]: d["translated"] for d in docs if d["_id"] in ids}
+        except Exception:
+            return {}  # the store is only an optimisation
+
+    def _store_save(self, fresh):
+        if not fresh:
+            return
+        try:
+            self._store().insert_many(
+                [{"_id": self._store_id(k), "text": k[0], "target": k[1],
+                  "translated": v, "ts": time.time()} for k, v in fresh.items()],
+                ordered=False,
+            )
+        except Exception:
+            pass  # duplicates from a concurrent worker are fine